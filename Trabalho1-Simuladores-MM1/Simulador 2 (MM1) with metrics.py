@@ -3,11 +3,18 @@
 # Servico dada por uma distribuicao exponencial
 
 import numpy as np
-import math
-import matplotlib.pyplot as plt
+import os
+import sys
+
+# Makes the shared 'filas' package (at the root of the repository) importable from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from filas import plotting, tracing
+from filas.distributions import Exponential
+from filas.event_queue import EventQueue
+from filas.online_stats import OnlineStatistics, TimeWeightedStatistics
 
 # Sets the random number generator seed to 1
-np.random.seed(1)
+rng = np.random.default_rng(1)
 
 # Initializes the number of customers in the system and the simulation time 
 n = 0
@@ -21,10 +28,14 @@ DEPARTURE = 2
 tax_arrival = 1         # arrival time
 tax_departure = 0.5     # service time
 
-# The eventqueue is a list that stores information about the future events in the simulation. Each element of the list represents an event,
-# with a tuple containing the time at which the event occurs, and the type of the event (either an arrival or a departure).
-eventqueue = [(np.random.exponential(1), ARRIVAL)]
-# In this simulation, the head of the event queue (the next event to occur) is always stored in the first element of the list
+# Distributions of the interarrival and service times; samples are taken from blocks generated in bulk
+arrival_distribution = Exponential(1/tax_arrival, rng)
+service_distribution = Exponential(1/tax_departure, rng)
+
+# The eventqueue is the future event list of the simulation. Each element represents an event, with the time at which the event occurs
+# and the type of the event (either an arrival or a departure). It is a binary heap, so the next event to occur is always the one removed by pop().
+eventqueue = EventQueue()
+eventqueue.schedule(arrival_distribution.sample(), ARRIVAL)
 
 # This array stores the time of arrival of each customer. It will be acessed during a arrival event.
 arrivals = []
@@ -36,154 +47,111 @@ waits = []
 # Array stores the number of customers each iteration
 customers = []
 
-# This variables receives the total number of elements in the event queue (being 1 at the start)
-nelements = 1
+# Constant-memory accumulators (count, mean, std and confidence interval) of waiting times and number of customers
+waits_stats = OnlineStatistics()
+customers_stats = OnlineStatistics()
+
+# Accumulator of the area under the number of customers N(t) and of the time spent with each number of customers
+customers_time = TimeWeightedStatistics()
 
-# This function calculates useful metrics of chosen list
-def metrics(list):
-    return len(list), np.mean(list), np.std(list), 1.96
+# The lists of samples are only needed by the bar plots at the end of the script
+KEEP_SAMPLES = True
 
-# This function calculates confidence interval
-def confidenceInterval(samples, mean, std, precision):
-    minCI = mean - (precision * (std / math.sqrt(samples) ))
-    maxCI = mean + (precision * (std / math.sqrt(samples) ))
-    return minCI, maxCI
+# Event trace: arrivals and departures are buffered and printed in bulk instead of one print() per event
+# (TRACE_LEVEL = tracing.OFF disables it; a path such as "trace.csv" or "trace.bin" as sink writes the events to a file)
+TRACE_LEVEL = tracing.EVENTS
+tracer = tracing.EventTracer(TRACE_LEVEL, sink = sys.stdout)
+trace = tracer.recorder()
 
 MAXITERATION = 10000
 # Starts the main simulation loop, which iterates MAXITERATION times or until there are no more events in the queue.
 for i in range(MAXITERATION):
 
     # This block checks if there are any more events in the queue. If there are no events, the simulation stops.
-    if (nelements == 0):
+    if (len(eventqueue) == 0):
+        tracer.close()
         print("The queue was emptied. End of simulation.")
         break
 
-    # These line picks the first event in the queue and store its time and type.
-    # current_event_time - stores time of the event
+    # This line removes the next event from the queue and updates the simulation time to the time of this event.
     # current_event_type - stores type of the event
-    current_event_time, current_event_type = eventqueue[0]
-
-    # Updates the simulation time to the time of the current event.
-    simultime = current_event_time
-
-    # This line removes the first event from the queue (total of elements decreases in 1).
-    nelements -= 1
-
-    # If there are more events in the queue, this block gets the next event in the queue
-    if (nelements >= 1):
-        eventqueue[0] = (eventqueue[1][0], eventqueue[1][1])
-        eventqueue.pop(1)
-        #print(len(eventqueue))
-        #print(nelements)
+    simultime, current_event_type, _ = eventqueue.pop()
 
 
     # This block checks if the current event is an arrival.
     if (current_event_type == ARRIVAL):
 
-        print(f"[{simultime:08.4f}] {'arrival':>10}, {n} => {n + 1}")     # This block prints out a message indicating the arrival,
+        if(trace): trace(simultime, ARRIVAL, n, n + 1)                      # This block traces the arrival,
         n += 1                                                          # updates the number of customers in the system
-        customers.append(n)                                                 # appends current number of customers
+        customers_stats.update(n)                                           # accounts current number of customers
+        customers_time.update(simultime, n)                                 # accounts time spent with the previous number of customers
+        if(KEEP_SAMPLES): customers.append(n)                               # appends current number of customers
         arrivals.append(simultime)                                          # appends arrival of current customer
-        time_next_arrival = np.random.exponential(tax_arrival)          # generates the time of the next arrival, which is exponentially distributed by 'tax_arrival'
-
-        # if there are no more events in the queue.
-        if (nelements == 0):
-            # Generates the service time for the new customer, which is exponentially distributed by tax_departure
-            time_next_service = np.random.exponential(tax_departure)
-
-            # Checks if the next arrival occurs before the service for the new customer finishes
-            if (time_next_arrival < time_next_service):
-
-                # If the next arrival occurs before the next departure, it schedules the departure of the old customer after the arrival of the new one
-                eventqueue.append((simultime + time_next_service, DEPARTURE))
-                eventqueue.append((simultime + time_next_arrival, ARRIVAL))
-
-                nelements += 2
+        time_next_arrival = arrival_distribution.sample()                   # generates the time of the next arrival, which is exponentially distributed by 'tax_arrival'
 
-            else:
-                # % Otherwise, it schedules the arrival of the new costumer after the departure of the old one
-                eventqueue.append((simultime + time_next_arrival, ARRIVAL))
-                eventqueue.append((simultime + time_next_service, DEPARTURE))
+        eventqueue.schedule(simultime + time_next_arrival, ARRIVAL)         # schedules the next arrival
 
-                nelements += 2
-
-        # If there are events in the queue, add the next arrival to the queue in the appropriate position
-        elif (eventqueue[0][0] > simultime + time_next_arrival):
-            eventqueue.insert(0, (simultime + time_next_arrival, ARRIVAL))
-
-            nelements += 1
-
-        # If the next arrival occurs before the next event in the queue, add it to the end of the queue
-        else:
-            eventqueue.append((simultime + time_next_arrival, ARRIVAL))
-
-            nelements += 1
+        # If the server was idle, the new customer starts its service right away
+        if (n == 1):
+            # Generates the service time for the new customer, which is exponentially distributed by tax_departure
+            time_next_service = service_distribution.sample()
+            eventqueue.schedule(simultime + time_next_service, DEPARTURE)
 
     # This block treats the event as a departure.
     else:
-        print(f"[{simultime:08.4f}] {'departure':>10}, {n} => {n - 1}")
+        if(trace): trace(simultime, DEPARTURE, n, n - 1)
         n = n-1
-        customers.append(n)                                                 # appends current number of customers
-        waits.append(simultime-arrivals[0])                                 # appends waiting time of departing customer
+        customers_stats.update(n)                                           # accounts current number of customers
+        customers_time.update(simultime, n)                                 # accounts time spent with the previous number of customers
+        if(KEEP_SAMPLES): customers.append(n)                               # appends current number of customers
+        waits_stats.update(simultime-arrivals[0])                           # accounts waiting time of departing customer
+        if(KEEP_SAMPLES): waits.append(simultime-arrivals[0])               # appends waiting time of departing customer
         arrivals.pop(0)
 
-        # If there are still elements in the queue
+        # If there are still customers in the system, the next one starts its service
         if (n > 0):
 
             # Generates next service time for the next customer, which is exponentially distributed with by 'tax_departure'
-            time_next_service = np.random.exponential(tax_departure)
+            time_next_service = service_distribution.sample()
+            eventqueue.schedule(simultime + time_next_service, DEPARTURE)
 
-            # If the next event in the queue is an arrival event and occurs before the next service time,
-            # we schedule the departure event immediately after the arrival event
-            if (eventqueue[0][0] < simultime + time_next_service):
-                eventqueue.append((simultime + time_next_service, DEPARTURE))
-
-                nelements += 1
-
-            # Otherwise, we schedule the departure event at the beginning of the queue
-            else:
-                eventqueue.insert(0, (simultime + time_next_service, DEPARTURE))
-
-                nelements += 1
-     
     # This block warns end of simulation by reaching max number of iterations
-    if(i==MAXITERATION-1): print(f"\nMax iteration number ({MAXITERATION}) reached. End of simulation\n")
+    if(i==MAXITERATION-1):
+        tracer.close()
+        print(f"\nMax iteration number ({MAXITERATION}) reached. End of simulation\n")
 
 # this block gets the number of customeres serviced, average waiting time and standard deviation of waiting time
-samples_w, mean_w, std_w, precision_w = metrics(waits)
+samples_w, mean_w, std_w, precision_w = waits_stats.metrics()
 
 # this block prints customers serviced and average waiting time
 print(f"Number of customers serviced (samples): {samples_w}")
 print(f"Average Waiting Time: {mean_w:08.4f}s")
 
 # this block gets the confidence interval and prints it
-ciMin_w, ciMax_w = confidenceInterval(samples_w, mean_w, std_w, precision_w)
+ciMin_w, ciMax_w = waits_stats.confidenceInterval(precision_w)
 print(f"Confidence Interval: [{ciMin_w:08.4f}, {ciMax_w:08.4f}]\n")
 
 # this block gets the number of customers per iteration, average number of customers and standard deviation of customers in the system
-samples_c, mean_c, std_c, precision_c = metrics(customers)
+samples_c, mean_c, std_c, precision_c = customers_stats.metrics()
 
 # this block prints average number of customers in the system
 print(f"Average number of customers in the system: {mean_c:08.4f} customers")
 
 # this block gets the confidence interval and prints it
-ciMin_c, ciMax_c = confidenceInterval(samples_c, mean_c, std_c, precision_c)
+ciMin_c, ciMax_c = customers_stats.confidenceInterval(precision_c)
 print(f"Confidence Interval: [{ciMin_c:08.4f}, {ciMax_c:08.4f}]")
 
-#this block creates a bar graph of waiting time per customer serviced
-print("\nCreating Waiting Time bar plot...\n")
-x_w = list(range(0, len(waits)))
-plt.bar(x_w, waits, color ='blue',width = 0.7)
-plt.xlabel("Customers serviced")
-plt.ylabel("Waiting time in seconds")
-plt.title("Waiting time per customer serviced")
-plt.show()
-
-#this block creates a bar graph of number of customers in the system per iteration of the simulator
-print("Creating Customer in System bar plot...")
-x_c = list(range(0, len(customers)))
-plt.bar(x_c, customers, color ='blue',width = 0.7)
-plt.xlabel("Iteration of simulator loop")
-plt.ylabel("Number of customers in the system")
-plt.title("Number of customers per iteration")
-plt.show()
+# this block prints the time-average number of customers (area under N(t) divided by the simulation time)
+# and the fraction of time the system spent with k customers
+print(f"Time-average number of customers in the system: {customers_time.mean():08.4f} customers")
+print("Fraction of time with k customers: " + ", ".join(f"k={k}: {p:.4f}" for k, p in enumerate(customers_time.pmf()[:5])) + "\n")
+
+# The bar graphs need every sample, so they are only created when the samples were kept
+if(KEEP_SAMPLES):
+    #this block creates a bar graph of waiting time per customer serviced
+    print("\nCreating Waiting Time bar plot...\n")
+    plotting.plotSeries(waits, "Waiting time per customer serviced", "Customers serviced", "Waiting time in seconds")
+
+    #this block creates a bar graph of number of customers in the system per iteration of the simulator
+    print("Creating Customer in System bar plot...")
+    plotting.plotSeries(customers, "Number of customers per iteration", "Iteration of simulator loop", "Number of customers in the system")
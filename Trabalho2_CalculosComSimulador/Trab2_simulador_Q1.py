@@ -2,9 +2,14 @@
 # Entrada dada por um processo Poison
 # Servico dada por uma distribuicao exponencial
 
-import matplotlib.pyplot as plt
 import numpy as np
-import math
+import os
+import sys
+
+# Makes the shared 'filas' package (at the root of the repository) importable from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from filas import plotting
+from filas.online_stats import OnlineStatistics
 
 # Sets the random number generator seed to 1
 np.random.seed(1)
@@ -24,11 +29,8 @@ firstCustomer = 0
 # Values consist of time_of_service (of last customer before empty) - time_of_arrival (of first customer after empty)
 busyPeriod = []
 
-# This function calculates confidence interval
-def confidenceInterval(list):
-    minCI = np.mean(list) - (1.96 * (np.std(list) / math.sqrt(len(list)) ))
-    maxCI = np.mean(list) + (1.96 * (np.std(list) / math.sqrt(len(list)) ))
-    return minCI, maxCI
+# Constant-memory accumulator (count, mean, std and confidence interval) of the busy periods
+busyPeriod_stats = OnlineStatistics()
 
 MAXITERATION = 10000
 # Starts the main simulation loop, which iterates MAXITERATION times.
@@ -48,25 +50,22 @@ for i in range(MAXITERATION):
         simultime += time_of_departure
         #print(f"[{simultime:08.4f}] {'departure':>10}, {n} => {n - 1}")     # This block prints out a message indicating the departure,
         n -= 1                                                              # updates the number of customers in the system
-        if(n==0): busyPeriod.append(simultime-firstCustomer)                # register busy period
+        if(n==0):                                                           # register busy period
+            busyPeriod_stats.update(simultime-firstCustomer)
+            busyPeriod.append(simultime-firstCustomer)
 
 print(f"\nMax iteration number ({MAXITERATION}) reached. End of simulation\n")
 
 # this block prints number of busy periods and their average
-print(f"Number of busy periods of server (samples): {len(busyPeriod)}")
-print(f"Average Busy Period: {np.mean(busyPeriod):08.4f}")
+print(f"Number of busy periods of server (samples): {busyPeriod_stats.count}")
+print(f"Average Busy Period: {busyPeriod_stats.mean:08.4f}")
 
 # this block gets the confidence interval and prints it
-ciMin, ciMax = confidenceInterval(busyPeriod)
+ciMin, ciMax = busyPeriod_stats.confidenceInterval()
 print(f"Confidence Interval: [{ciMin:08.4f}, {ciMax:08.4f}]\n")
 
 #"""
 #this block creates a bar graph for comparison of duration of the busy periods
 print("\nCreating Busy Period bar graph...\n")
-x_w = list(range(0, len(busyPeriod)))
-plt.bar(x_w, busyPeriod, color ='blue',width = 0.7)
-plt.xlabel("Busy periods")
-plt.ylabel("Time in seconds")
-plt.title("Busy Period Comparison")
-plt.show()
+plotting.plotSeries(busyPeriod, "Busy Period Comparison", "Busy periods", "Time in seconds")
 #"""
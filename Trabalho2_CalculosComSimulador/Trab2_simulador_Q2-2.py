@@ -2,32 +2,39 @@
 # Entrada dada por um processo Poison
 # Servico dada por uma distribuicao exponencial
 
-import matplotlib.pyplot as plt
 import numpy as np
-import math
-
-# Sets the random number generator seed to 1
-np.random.seed()
-
-# This block defines lambda, mu and the Average Busy Period (ABP = E(B_C)) according mathematical analysis of Question 2.1
+import os
+import sys
+
+# Makes the shared 'filas' package (at the root of the repository) importable from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from filas import analytical, plotting
+from filas.birth_death import firstPassageTime, firstPassageTimes
+from filas.replications import runReplications
+from filas.result_cache import ResultCache
+from filas.streams import RandomStreams
+
+# Root seed of the random number streams. None draws a fresh one, which is printed with the results so that the run can be repeated.
+# Each replication i of each C gets its own independent stream derived from it.
+ROOT_SEED = None
+streams = RandomStreams(ROOT_SEED)
+
+# With a fixed root seed the statistics of each C are saved in the result cache, so running the script again only simulates the missing ones
+RESULTS = ResultCache() if ROOT_SEED is not None else None
+
+# This block defines lambda and mu; the expected values (the Average Busy Period E(B_C) according mathematical analysis of Question 2.1) come from filas.analytical
 LAMBDAMM1 = 1
 MUMM1 = 2
-ABP = (1/MUMM1)/(1-(LAMBDAMM1/MUMM1))
-
-# This function calculates confidence interval
-def confidenceInterval(list):
-    minCI = np.mean(list) - (1.96 * (np.std(list) / math.sqrt(len(list)) ))
-    maxCI = np.mean(list) + (1.96 * (np.std(list) / math.sqrt(len(list)) ))
-    return minCI, maxCI
 
 # this function calculates number of times to 1 client, their average, confidence interval and if expected values are within the interval 
-def metricsTimeToLastClient(list, c):
+# 'stats' is the OnlineStatistics accumulator of the times to 1 client
+def metricsTimeToLastClient(stats, c):
 
-    expectedValue = (c*ABP) - ABP       # E(U_C) = C*E(B_C) - E(B_C) according to mathematical analysis of Question 2.2
+    expectedValue = analytical.firstPassage(LAMBDAMM1, MUMM1, c, 1)       # E(U_C) = C*E(B_C) - E(B_C) according to mathematical analysis of Question 2.2
 
-    ciMin, ciMax = confidenceInterval(list)
-    print(f"Number of samples: {len(list)}")
-    print(f"Average Time until 1 client, C = {c}: {np.mean(list):.4f}")
+    ciMin, ciMax = stats.confidenceInterval()
+    print(f"Number of samples: {stats.count}")
+    print(f"Average Time until 1 client, C = {c}: {stats.mean:.4f}")
     print(f"Confidence Interval: [{ciMin:.4f}, {ciMax:.4f}]")
 
     if(ciMin<=expectedValue<=ciMax):
@@ -41,63 +48,68 @@ def metricsTimeToLastClient(list, c):
 
 # this function realiza a M/M/1 simulation
 # This simulator specifically starts with predefined customers and ends when the server reaches 1 customer for the first time
-def simulatorMM1(n):
+# 'rng' is the random number generator of the replication
+def simulatorMM1(n, rng):
     
-    # Initializes the simulation time 
-    simultime = 0
-
     # Variables which armazenate the times of arrival and departure
     tax_arrival = 1         # arrival time (1/lambda, where lambda=1)
     tax_departure = 0.5     # service time (1/mu, where mu=2)
 
     #print(f"\nBeginning M/M/1 simulator with {n} customers.\n")
 
-    # Starts the main simulation loop, which iterates until the server reaches 1 customer
-    while(1):
+    # Every state visited before the end has at least one customer, so the chain jumps at rate lambda + mu (single-draw stepping):
+    # the directions of the jumps are drawn in blocks until the walk reaches 1 customer and the elapsed time,
+    # a sum of exponential holding times, is a single Gamma draw
+    simultime = firstPassageTime(1/tax_arrival, 1/tax_departure, n, 1, rng)
 
-        # this block get samples exponentially distributed by the variables tax_arrival or tax_departure
-        time_of_arrival = np.random.exponential(tax_arrival)
-        time_of_departure = np.random.exponential(tax_departure)
+    #print(f"\nSystem empty. End of simulation with {simultime:08.4f} time\n")
+    return simultime                                                            # Return time until last client in the server
 
-        if (n==0 or time_of_arrival < time_of_departure):
-            simultime += time_of_arrival
-            #print(f"[{simultime:08.4f}] {'arrival':>10}, {n} => {n + 1}")      # This block prints out a message indicating the arrival,
-            n += 1                                                              # updates the number of customers in the system
+# this function realizes 'count' M/M/1 simulations together, in lock-step (see filas.birth_death.firstPassageTimes)
+# The trajectories are NumPy arrays advanced block by block, each one retired when it reaches 1 customer
+def simulatorMM1Vectorized(n, rng, count):
 
-        else:
-            simultime += time_of_departure
-            #print(f"[{simultime:08.4f}] {'departure':>10}, {n} => {n - 1}")    # This block prints out a message indicating the departure,
-            n -= 1                                                              # updates the number of customers in the system
-            if(n==1): break                                                     # end simulation loop
+    # Variables which armazenate the times of arrival and departure
+    tax_arrival = 1         # arrival time (1/lambda, where lambda=1)
+    tax_departure = 0.5     # service time (1/mu, where mu=2)
 
-    #print(f"\nSystem empty. End of simulation with {simultime:08.4f} time\n")
-    return simultime                                                            # Return time until last client in the server
+    return firstPassageTimes(1/tax_arrival, 1/tax_departure, np.full(count, n), 1, rng)     # Return time until last client in the server of every simulation
 
 # This block defines the range of starting number of customers in the system and number of iterations
 MINCUSTOMERS = 2
 MAXCUSTOMERS = 10
 NUMITERATIONS = 400
 
-#This block defines list of average times and variable of successes
-avgTimeToLastClient = []
-successes = 0
+# The replications run in parallel: WORKERS processes (None uses every core), each task running BATCHSIZE replications of one C
+# VECTORIZED runs the replications of each task together, in lock-step, instead of one after the other
+VECTORIZED = True
+WORKERS = None
+BATCHSIZE = 10000 if VECTORIZED else 100
+
+# Target relative half-width of the confidence intervals (e.g. 0.02 for +-2%). When defined, the replications of each C stop
+# as soon as it is reached (after at least MINITERATIONS), NUMITERATIONS becoming the maximum. None runs exactly NUMITERATIONS.
+TARGET_PRECISION = None
+MINITERATIONS = 30
 
 # This block executes the program based on Question 2.2 parameters
-for numC in range (MINCUSTOMERS,MAXCUSTOMERS+1):
-    temp = []
-    for i in range (NUMITERATIONS):
-        temp.append(simulatorMM1(numC))
-    if(metricsTimeToLastClient(temp, numC)): successes += 1
-    avgTimeToLastClient.append(np.mean(temp))
-print(f"Simulation ended with {successes}/{MAXCUSTOMERS-MINCUSTOMERS+1} successes.\n")
-
-#"""
-#this block creates a bar graph for comparison of duration of the times to 1 client
-print("Creating Time To Last Client bar graph...\n")
-x = list(range(MINCUSTOMERS,MAXCUSTOMERS+1))
-plt.bar(x, avgTimeToLastClient, color ='blue',width = 0.7)
-plt.xlabel("C = 2, 3, ..., 10")
-plt.ylabel("Average Time To Last Client")
-plt.title("Time To Last Client Comparison")
-plt.show()
-#"""
+# (the main code is protected so that the worker processes can import this script without running the sweep)
+if __name__ == "__main__":
+
+    #This block defines list of average times and variable of successes
+    avgTimeToLastClient = []
+    successes = 0
+
+    customerRange = list(range(MINCUSTOMERS,MAXCUSTOMERS+1))
+    simulator = simulatorMM1Vectorized if VECTORIZED else simulatorMM1
+    results = runReplications(simulator, customerRange, NUMITERATIONS, streams, WORKERS, BATCHSIZE, TARGET_PRECISION, MINITERATIONS, VECTORIZED, cache = RESULTS)
+    for numC, temp in zip(customerRange, results):
+        if(metricsTimeToLastClient(temp, numC)): successes += 1
+        avgTimeToLastClient.append(temp.mean)
+    print(f"Simulation ended with {successes}/{MAXCUSTOMERS-MINCUSTOMERS+1} successes.")
+    print(f"Root seed: {streams.root_seed}\n")
+
+    #"""
+    #this block creates a bar graph for comparison of duration of the times to 1 client
+    print("Creating Time To Last Client bar graph...\n")
+    plotting.plotSeries(avgTimeToLastClient, "Time To Last Client Comparison", "C = 2, 3, ..., 10", "Average Time To Last Client", start = MINCUSTOMERS)
+    #"""
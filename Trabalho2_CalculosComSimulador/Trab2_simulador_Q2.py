@@ -2,12 +2,19 @@
 # Entrada dada por um processo Poison
 # Servico dada por uma distribuicao exponencial
 
-import matplotlib.pyplot as plt
-import numpy as np
-import math
+import os
+import sys
 
-# Sets the random number generator seed to 1
-np.random.seed()
+# Makes the shared 'filas' package (at the root of the repository) importable from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from filas import plotting
+from filas.hitting_times import HittingTimeTracker
+from filas.streams import RandomStreams
+
+# Root seed of the random number generator. None draws a fresh one, which is printed at the end so that the run can be repeated.
+ROOT_SEED = None
+streams = RandomStreams(ROOT_SEED)
+rng = streams.stream(0)
 
 # Initializes the number of customers in the system and the simulation time 
 n = 0
@@ -17,61 +24,50 @@ simultime = 0
 tax_arrival = 1         # arrival time (1/lambda, where lambda=1)
 tax_departure = 0.5     # service time (1/mi, where mi=2)
 
-# This array stores the time of arrival of each customer of the desired sequence. It will be acessed during a arrival event.
-#For this case, its C = 2,3,4,...,10
-customerSequence = {2:0.0, 3:0.0, 4:0.0, 5:0.0, 6:0.0, 7:0.0, 8:0.0, 9:0.0, 10:0.0}
-
-# This array stores the busy periods of the server. It will be acessed during a departure event.
-# Values consist of time_of_service (of last customer before empty) - time_of_arrival (of first customer after empty)
-busyPeriod = {2:[], 3:[], 4:[], 5:[], 6:[], 7:[], 8:[], 9:[], 10:[]}
+# Values of C analysed. For this case, its C = 2,3,4,...,10 (any set of levels can be given, e.g. range(2, 501))
+LEVELS = range(2, 11)
 
-# This function calculates confidence interval
-def confidenceInterval(list):
-    minCI = np.mean(list) - (1.96 * (np.std(list) / math.sqrt(len(list)) ))
-    maxCI = np.mean(list) + (1.96 * (np.std(list) / math.sqrt(len(list)) ))
-    return minCI, maxCI
+# This tracker stores the time of the first arrival of each busy period that brings the system to C customers (accessed during an arrival event)
+# and, when the server empties (departure event), registers the busy periods started by C customers:
+# time_of_service (of last customer before empty) - time_of_arrival (of the first customer that brought the system to C customers)
+tracker = HittingTimeTracker(max(LEVELS))
 
 MAXITERATION = 10000
 # Starts the main simulation loop, which iterates MAXITERATION times.
 for i in range(MAXITERATION):
 
     # this block get samples exponentially distributed by the variables tax_arrival or tax_departure
-    time_of_arrival = np.random.exponential(tax_arrival)
-    time_of_departure = np.random.exponential(tax_departure)
+    time_of_arrival = rng.exponential(tax_arrival)
+    time_of_departure = rng.exponential(tax_departure)
 
     if (n==0 or time_of_arrival < time_of_departure):
         simultime += time_of_arrival
         #print(f"[{simultime:08.4f}] {'arrival':>10}, {n} => {n + 1}")      # This block prints out a message indicating the arrival,
         n += 1                                                              # updates the number of customers in the system
-        if(2 <= n <= 10):
-            customerSequence[n] = simultime                                 # register the arrival of target customer (2 -> 10)
+        tracker.arrival(simultime, n)                                       # register the arrival of target customer (first time at n customers)
 
     else:
         simultime += time_of_departure
         #print(f"[{simultime:08.4f}] {'departure':>10}, {n} => {n - 1}")     # This block prints out a message indicating the departure,
         n -= 1                                                              # updates the number of customers in the system
         if(n==0):
-            for i in range (2,11):
-                if (customerSequence.get(i)!=0.0):                      # Verify if the i-th customer arrived
-                    temp = busyPeriod.get(i)                            #
-                    temp.append(simultime-customerSequence.get(i))      # this block registers the desired busy periods
-                    busyPeriod[i] = temp                                #
-            customerSequence.update({2:0.0, 3:0.0, 4:0.0, 5:0.0, 6:0.0, 7:0.0, 8:0.0, 9:0.0, 10:0.0})         #resets the times of arrival
+            tracker.emptied(simultime)                                      # this block registers the desired busy periods and resets the times of arrival
 
-print(f"\nMax iteration number ({MAXITERATION}) reached. End of simulation\n")
+print(f"\nMax iteration number ({MAXITERATION}) reached. End of simulation")
+print(f"Root seed: {streams.root_seed}\n")
 
 means = []
 samples = []
 
 # this block prints number of busy periods, their average and the confidence interval
-for i in range (2,11):
-    periods = busyPeriod.get(i)
-    numSamples = len(periods)
+for i in LEVELS:
+    periods = tracker.statistics(i)
+    numSamples = periods.count
     samples.append(numSamples)
     if(numSamples):
-        avg = np.mean(periods)
+        avg = periods.mean
         means.append(avg)
-        ciMin, ciMax = confidenceInterval(periods)
+        ciMin, ciMax = periods.confidenceInterval()
         print(f"Average Busy Period, C={i}: {avg:08.4f} . Number of samples: {numSamples}")
         print(f"Confidence Interval: [{ciMin:08.4f}, {ciMax:08.4f}]\n\n")
     else:
@@ -83,21 +79,11 @@ for i in range (2,11):
 #"""
 #this block creates a bar graph for comparison of duration of the busy periods
 print("\nCreating Busy Period bar graph...\n")
-x_w = list(range(2,11))
-plt.bar(x_w, means, color ='blue',width = 0.7)
-plt.xlabel("C = 2, 3, ..., 10")
-plt.ylabel("Average Busy Period")
-plt.title("Busy Period Comparison")
-plt.show()
+plotting.plotSeries(means, "Busy Period Comparison", "C = 2, 3, ..., 10", "Average Busy Period", start = LEVELS[0])
 #"""
 
 #"""
 #this block creates a bar graph for comparison of duration of the busy periods
 print("\nCreating Samples bar graph...\n")
-x_w = list(range(2,11))
-plt.bar(x_w, samples, color ='blue',width = 0.7)
-plt.xlabel("C = 2, 3, ..., 10")
-plt.ylabel("Number of Samples")
-plt.title("Number of Samples Comparison")
-plt.show()
+plotting.plotSeries(samples, "Number of Samples Comparison", "C = 2, 3, ..., 10", "Number of Samples", start = LEVELS[0])
 #"""
@@ -1,12 +1,26 @@
-# M/M/1
-# Arrival defined by a Poisson process
-# Service defined by a exponential distribution
+# M/M/1 and variants (M/D/1, M/G/1, G/G/1)
+# Arrival defined by a Poisson process (or any interarrival distribution)
+# Service defined by a exponential distribution (or any service distribution)
 
-import matplotlib.pyplot as plt
 import numpy as np
 import math
 from collections import deque
 from time import time
+import os
+import sys
+
+# Makes the shared 'filas' package (at the root of the repository) importable from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from filas import analytical, plotting, tracing
+from filas.birth_death import BirthDeathStepper, uniformizedIterations
+from filas.distributions import Deterministic, Erlang, Exponential, HyperExponential
+from filas.lindley import lindleyIterations
+from filas.online_stats import OnlineStatistics, TimeWeightedStatistics
+from filas.quantiles import QuantileSketch, ecdf, pmfQuantiles
+from filas.result_cache import ResultCache, codeVersion, packState, unpackState
+from filas.sequential import BatchMeans, RegenerativeStatistics, precisionReached
+from filas.streams import RandomStreams
+from filas.sweep import printSweep, rhoGrid, runSweep
 
 # This function calculates confidence interval
 # Requires numpy and math libraries
@@ -21,134 +35,342 @@ def confidenceInterval(list):
 
 # This function plots the CDF of waiting times and customer numbers according to professor suggestion
 # <https://stackoverflow.com/questions/9378420/how-to-plot-cdf-in-matplotlib-in-python>
+# The exact empirical CDFs are computed over NumPy arrays (filas.quantiles.ecdf: counts for the number of customers, no Python sort)
 def plotCDF(waits, customers):
-    
-    wait_times_sorted = sorted(waits)
-    num_customers_sorted = sorted(customers)
 
-    plt.hist(wait_times_sorted, density=True, cumulative=True, histtype='step', alpha=0.8, color='k')
-    plt.title("CDF of Waiting Times")
-    plt.show()
+    wait_values, wait_fractions = ecdf(np.asarray(waits, dtype = float))
+    customer_values, customer_fractions = ecdf(np.asarray(customers, dtype = np.int64))
+
+    plotting.plotEcdf(wait_values, wait_fractions, "CDF of Waiting Times", "Waiting time in seconds")
+
+    plotting.plotEcdf(customer_values, customer_fractions, "CDF of Number of Customers in the System", "Number of customers in the system")
 
-    plt.hist(num_customers_sorted, density=True, cumulative=True,histtype='step', alpha=0.8, color='k')
-    plt.title("CDF of Number of Customers in the System")
-    plt.show()
+# Probabilities of the quantiles shown by the simulator
+QUANTILES = (0.5, 0.95, 0.99)
 
-# This function realizes a M/M/1 simulation
+# This function realizes a G/G/1 simulation: interarrival and service times are given by distribution objects of filas.distributions
+# (Exponential, Deterministic, Erlang, HyperExponential, LogNormal, Empirical), so the same simulator covers M/M/1, M/D/1, M/G/1 and G/G/1
 # Max iterations and initial number of customers have default values
-def simulatorMM1(lambda_mm1, mu_mm1, show_messages = False, show_metrics = True, show_plots = False, max_iterations = 10000, initial_customers = 0):
-    
-    # Initializes the simulation time, number of customers and random number generator
+# engine = "events" advances one event per loop iteration, engine = "lindley" computes the same outputs with the vectorized Lindley recursion
+# With exponential interarrival and service times (M/M/1), the number of customers is a birth-death chain and two more engines are available:
+# engine = "ctmc" advances one event per loop iteration with a single holding time and a uniform for the direction of the jump,
+# engine = "uniformized" generates the jumps of the uniformized chain in vectorized blocks
+# keep_samples = False keeps only constant-memory statistics, which are returned in place of the lists of samples
+# The quantiles of the waiting time (p50, p95, p99) come from a streaming sketch (filas.quantiles.QuantileSketch, bounded memory) and those
+# of the number of customers from the fraction of time with each number of customers, so they are available without the samples
+# target_precision (e.g. 0.02) stops the simulation as soon as the confidence interval of the waiting time reaches this relative half-width,
+# max_iterations becoming the maximum; the interval is built with batch means (ci_method = "batch", batches of 'batch_size' customers)
+# or with the regenerative method (ci_method = "regenerative", cycles end when a departure leaves the system empty)
+# show_messages prints the arrivals and departures through a buffered tracer; a tracing.EventTracer can be given instead (e.g. writing to a file)
+# name is the Kendall notation used in the messages (e.g. "M/D/1")
+# cache is a filas.result_cache.ResultCache: a run with the same distributions (parameters and states of the generators), iterations and options
+# is loaded from it instead of simulated (the generators are then not advanced and no events are traced)
+def simulatorGG1(arrival_distribution, service_distribution, show_messages = False, show_metrics = True, show_plots = False, max_iterations = 10000, initial_customers = 0, engine = "events",
+                 keep_samples = True, target_precision = None, ci_method = "batch", batch_size = 1000, tracer = None, name = "G/G/1", cache = None):
+
+    # Initializes the simulation time and number of customers
+    # Lambda and mu are the arrival and service rates (inverse of the mean interarrival and service times)
     simultime = 0
     num_customers = initial_customers
-    rho_mm1 = lambda_mm1/mu_mm1 
-    rng = np.random.default_rng()
+    lambda_gg1 = 1/arrival_distribution.mean()
+    mu_gg1 = 1/service_distribution.mean()
+    rho_gg1 = lambda_gg1/mu_gg1
+    markovian = isinstance(arrival_distribution, Exponential) and isinstance(service_distribution, Exponential)
+    if(engine in ("ctmc", "uniformized") and not markovian):
+        raise ValueError(f"engine '{engine}' requires exponential interarrival and service times")
 
     # Auxiliary lists (using collections.deques) for sampling waiting times and customer numbers
-    arrivals = deque([])
+    # Initial customers are in the system since time 0
+    arrivals = deque([0.0]*initial_customers)
     waits = deque([])
     customers = deque([])
 
-    # Variables defining parameters of arrival and departure
-    # Numpy exponential function uses the scale parameter, which is the inverse of the rate parameter (in this case lambda and mu) 
-    # <https://numpy.org/doc/stable/reference/random/generated/numpy.random.Generator.exponential.html#numpy.random.Generator.exponential>
-    arrival_scale = 1/lambda_mm1           
-    departure_scale = 1/mu_mm1            
+    # Accumulators of mean, std and confidence interval of waiting times and customer numbers, updated at every event
+    waits_stats = OnlineStatistics()
+    customers_stats = OnlineStatistics()
 
-    print(f"\nBeginning M/M/1 simulator with {num_customers} customers.")
-    start_time = time()
+    # Streaming sketch of the distribution of the waiting time (quantiles in bounded memory)
+    waits_quantiles = QuantileSketch()
+
+    # Accumulator of the area under the number of customers N(t) and of the time spent with each number of customers
+    customers_time = TimeWeightedStatistics(initial_customers)
 
-    # Starts the main simulation loop, which iterates until the max iterations is reached.
-    for _ in range(max_iterations):
+    # Estimator of the confidence interval of the waiting time used by the sequential stopping rule
+    if(ci_method == "regenerative"):
+        waits_sequential = RegenerativeStatistics()
+    else:
+        waits_sequential = BatchMeans(batch_size)
+    precision_reached = False
 
-        # this block get samples exponentially distributed by the variables arrival_scale or departure_scale
-        # while arrivals occur according to a Poisson process, time between Poisson arrivals is exponential distribution
-        time_of_arrival = rng.exponential(arrival_scale)
-        time_of_departure = rng.exponential(departure_scale)
+    # Event trace (None when disabled, so the loop only tests a local variable)
+    if(tracer is None and show_messages):
+        tracer = tracing.EventTracer(sink = sys.stdout)
+    trace = tracer.recorder() if tracer is not None else None
 
-        if (num_customers==0 or time_of_arrival < time_of_departure):
-            simultime += time_of_arrival
-            if(show_messages):
-                print(f"[{simultime:08.4f}] {'arrival':>10}, {num_customers} => {num_customers + 1}")       # This block prints out a message indicating the arrival,
-            num_customers += 1                                                      # updates the number of customers in the system
-            customers.append(num_customers)                                         # appends current number of customers
-            arrivals.append(simultime)                                              # appends arrival of current customer
+    # Configuration of the run in the result cache (None when it is not cached)
+    run_config = None
+    if(cache is not None and arrival_distribution.configuration() is not None and service_distribution.configuration() is not None):
+        run_config = {"simulator": "simulatorGG1", "code": codeVersion(simulatorGG1), "arrival": arrival_distribution.configuration(),
+                      "service": service_distribution.configuration(), "max_iterations": max_iterations, "initial_customers": initial_customers,
+                      "engine": engine, "target_precision": target_precision, "ci_method": ci_method, "batch_size": batch_size}
+    saved = cache.load(run_config) if run_config is not None else None
+    if(saved is not None and keep_samples and "waits" not in saved):
+        saved = None                                                    # the saved run did not keep its samples
 
+    if(show_metrics):
+        print(f"\nBeginning {name} simulator with {num_customers} customers.")
+    start_time = time()
+
+    if(saved is not None):
+        # The same run was saved: its accumulators (and samples) are restored instead of simulated
+        for accumulator, prefix in ((waits_stats, "waits_stats"), (customers_stats, "customers_stats"), (customers_time, "customers_time"),
+                                    (waits_sequential, "waits_sequential"), (waits_quantiles, "waits_quantiles")):
+            unpackState(accumulator, saved, prefix)
+        precision_reached = bool(saved["precision_reached"])
+        if(keep_samples):
+            waits, customers = saved["waits"], saved["customers"]
+        if(show_metrics):
+            print("Results loaded from the cache.")
+
+    elif(engine in ("lindley", "uniformized")):
+        # Draws interarrival and service times (or holding times and jump directions) as arrays and gets, chunk by chunk,
+        # the sojourn times and the number of customers after each event
+        # With a target precision, chunks are kept small so that the stopping rule is checked often
+        chunk_size = 10*batch_size if target_precision else 1000000
+        if(engine == "lindley"):
+            chunks = lindleyIterations(arrival_distribution, service_distribution, max_iterations, initial_customers = initial_customers, chunk_size = chunk_size)
         else:
-            simultime += time_of_departure
-            if(show_messages):
-                print(f"[{simultime:08.4f}] {'departure':>10}, {num_customers} => {num_customers - 1}")     # This block prints out a message indicating the departure,
-            num_customers -= 1                                                      # updates the number of customers in the system
-            customers.append(num_customers)                                         # appends current number of customers
-            waits.append(simultime-arrivals.popleft())                              # appends waiting time of departing customer
+            chunks = uniformizedIterations(lambda_gg1, mu_gg1, max_iterations, initial_customers = initial_customers, rng = arrival_distribution.rng, chunk_size = chunk_size)
+        for chunk_times, chunk_customers, chunk_waits in chunks:
+            before = np.concatenate(([num_customers], chunk_customers[:-1]))            # number of customers before each event
+            is_departure = chunk_customers < before
+            num_customers = int(chunk_customers[-1])
+            if(trace):
+                tracer.recordMany(chunk_times, np.where(is_departure, tracing.DEPARTURE, tracing.ARRIVAL), before, chunk_customers)
+            if(ci_method == "regenerative"):
+                # Departures that leave the system empty end the cycles (index of the departing customer within chunk_waits)
+                departure_index = np.cumsum(is_departure) - 1
+                waits_sequential.updateMany(chunk_waits, departure_index[is_departure & (chunk_customers == 0)])
+            else:
+                waits_sequential.updateMany(chunk_waits)
+            customers_stats.updateMany(chunk_customers)
+            customers_time.updateMany(chunk_times, chunk_customers)
+            waits_stats.updateMany(chunk_waits)
+            waits_quantiles.updateMany(chunk_waits)
+            if(keep_samples):
+                customers.append(chunk_customers)
+                waits.append(chunk_waits)
+            if(target_precision and precisionReached(waits_sequential, target_precision)):
+                precision_reached = True
+                break
+        if(keep_samples):
+            customers = np.concatenate(customers) if customers else np.empty(0, dtype = np.int64)
+            waits = np.concatenate(waits) if waits else np.empty(0)
+
+    else:
+        # Samples come from the pre-generated blocks of the distributions
+        next_interarrival = arrival_distribution.sample
+        next_service = service_distribution.sample
+        record_wait = waits_quantiles.update
+
+        # A single server only has two pending events: the next arrival and the end of the current service (infinite when the server is idle)
+        # The "ctmc" engine draws instead the holding time in the current state and the direction of the jump
+        stepper = BirthDeathStepper(lambda_gg1, mu_gg1, arrival_distribution.rng) if engine == "ctmc" else None
+        next_arrival = next_interarrival() if stepper is None else math.inf
+        next_departure = next_service() if num_customers > 0 and stepper is None else math.inf
+
+        # Starts the main simulation loop, which iterates until the max iterations is reached.
+        for _ in range(max_iterations):
+
+            if(stepper is not None):
+                holding, is_arrival = stepper.step(num_customers)
+                simultime += holding
+            else:
+                is_arrival = next_arrival < next_departure
+                simultime = next_arrival if is_arrival else next_departure
+
+            if (is_arrival):
+                if(trace): trace(simultime, tracing.ARRIVAL, num_customers, num_customers + 1)     # This block traces the arrival,
+                num_customers += 1                                                      # updates the number of customers in the system
+                customers_stats.update(num_customers)                                   # accounts current number of customers
+                customers_time.update(simultime, num_customers)                         # accounts time spent with the previous number of customers
+                if(keep_samples): customers.append(num_customers)                       # appends current number of customers
+                arrivals.append(simultime)                                              # appends arrival of current customer
+                if(stepper is None):
+                    next_arrival = simultime + next_interarrival()                      # schedules the next arrival
+                    if(num_customers == 1):
+                        next_departure = simultime + next_service()                     # the server was idle: the service starts right away
+
+            else:
+                if(trace): trace(simultime, tracing.DEPARTURE, num_customers, num_customers - 1)   # This block traces the departure,
+                num_customers -= 1                                                      # updates the number of customers in the system
+                customers_stats.update(num_customers)                                   # accounts current number of customers
+                customers_time.update(simultime, num_customers)                         # accounts time spent with the previous number of customers
+                wait = simultime-arrivals.popleft()                                     # waiting time of departing customer
+                waits_stats.update(wait)
+                record_wait(wait)
+                if(keep_samples):
+                    customers.append(num_customers)                                     # appends current number of customers
+                    waits.append(wait)                                                  # appends waiting time of departing customer
+                if(stepper is None):
+                    next_departure = simultime + next_service() if num_customers > 0 else math.inf     # the next customer starts its service
+
+                # This block feeds the sequential estimator and checks the stopping rule when a batch (or a cycle) is completed
+                if(ci_method == "regenerative"):
+                    waits_sequential.update(wait)
+                    unit_completed = num_customers == 0                                 # a departure leaving the system empty is a regeneration point
+                    if(unit_completed): waits_sequential.endCycle()
+                else:
+                    unit_completed = waits_sequential.update(wait)
+                if(target_precision and unit_completed and precisionReached(waits_sequential, target_precision)):
+                    precision_reached = True
+                    break
 
     end_time = time()
-    print(f"\nMax iteration number ({max_iterations}) reached. End of simulation. Duration of {(end_time-start_time):.4} seconds.\n")
+    if(tracer is not None):
+        tracer.flush()
+    if(run_config is not None and saved is None):
+        arrays = {**packState(waits_stats, "waits_stats"), **packState(customers_stats, "customers_stats"), **packState(customers_time, "customers_time"),
+                  **packState(waits_sequential, "waits_sequential"), **packState(waits_quantiles, "waits_quantiles"), "precision_reached": np.asarray(precision_reached)}
+        if(keep_samples):
+            arrays.update(waits = np.asarray(waits), customers = np.asarray(customers))
+        cache.store(run_config, arrays)
+    if(show_metrics and precision_reached):
+        print(f"\nTarget precision ({target_precision}) reached after {customers_stats.count} iterations. End of simulation. Duration of {(end_time-start_time):.4} seconds.\n")
+    elif(show_metrics):
+        print(f"\nMax iteration number ({max_iterations}) reached. End of simulation. Duration of {(end_time-start_time):.4} seconds.\n")
+
+    # Analytical values (filas.analytical): M/M/1 formulas when both distributions are exponential, M/D/1 formulas for a deterministic
+    # service, Pollaczek-Khinchine formula for Poisson arrivals and any other service distribution (M/G/1), none otherwise
+    stable = lambda_gg1<mu_gg1
+    if(not stable):
+        avg_num_customers = avg_wait_time = None
+    elif(markovian):
+        avg_num_customers = analytical.mm1Customers(lambda_gg1, mu_gg1)
+        avg_wait_time = analytical.mm1Wait(lambda_gg1, mu_gg1)
+        formula_customers, formula_wait = "(rho/(1-rho))", "(1/(mu-lambda))"
+    elif(isinstance(arrival_distribution, Exponential) and isinstance(service_distribution, Deterministic)):
+        avg_num_customers = analytical.md1Customers(lambda_gg1, mu_gg1)
+        avg_wait_time = analytical.md1Wait(lambda_gg1, mu_gg1)
+        formula_customers, formula_wait = "(M/D/1, rho + rho^2/(2(1-rho)))", "(M/D/1, 1/mu + rho/(2mu(1-rho)))"
+    elif(isinstance(arrival_distribution, Exponential)):
+        avg_num_customers = analytical.mg1Customers(lambda_gg1, service_distribution.mean(), service_distribution.secondMoment())
+        avg_wait_time = analytical.mg1Wait(lambda_gg1, service_distribution.mean(), service_distribution.secondMoment())
+        formula_customers, formula_wait = "(Pollaczek-Khinchine, lambda*W)", "(Pollaczek-Khinchine, E[S] + lambda*E[S^2]/(2(1-rho)))"
+    else:
+        avg_num_customers = avg_wait_time = None
 
     # This block shows metrics of waiting times and number of customers
     if(show_metrics):
-        # this block prints average number of customers in the system and confidence interval
-        print(f"Sampled average number of customers in the system: {np.mean(customers):.4f} customers.")
-        ciMin_c, ciMax_c = confidenceInterval(customers)
-        print(f"Confidence Interval: [{ciMin_c:.4f}, {ciMax_c:.4f}]")
+        # this block prints the time-average number of customers in the system (area under N(t) over simulated time) and its confidence
+        # interval (batch means in time); the average over the events is biased (arrivals and departures do not see the time-average)
+        print(f"Time-average number of customers in the system: {customers_time.mean():.4f} customers.")
+        ciMin_c, ciMax_c = customers_time.confidenceInterval()
+        print(f"Confidence Interval ({len(customers_time.batch_areas)} batches in time): [{ciMin_c:.4f}, {ciMax_c:.4f}]")
+        print(f"Average number of customers after each event (not time-weighted): {customers_stats.mean:.4f} customers.")
 
-        if(not lambda_mm1<mu_mm1):
+        if(not stable):
             print("[Arrivals] are faster than [Services], queue will grow indefinitely long!\n")
-        else:
-            avg_num_customers = rho_mm1/(1-rho_mm1)
-            print(f"Analytical average number of customers, according to (rho/(1-rho)): {avg_num_customers} customers.")
+        elif(avg_num_customers is not None):
+            print(f"Analytical average number of customers, according to {formula_customers}: {avg_num_customers} customers.")
             success = ciMin_c<=avg_num_customers<=ciMax_c
             if(success):
                 print(f"SUCCESS. Expected value {avg_num_customers} within confidence interval.\n")
             else:
                 print(f"FAILURE. Expected value {avg_num_customers} NOT within confidence interval.\n")
 
+        # this block prints the fraction of time with k customers
+        if(markovian and stable):
+            pmf = analytical.mm1Pmf(lambda_gg1, mu_gg1, np.arange(5))
+            fractions = ", ".join(f"k={k}: {p:.4f} ({pmf[k]:.4f})" for k, p in enumerate(customers_time.pmf()[:5]))
+            print(f"Fraction of time with k customers (analytical (1-rho)*rho^k): {fractions}\n")
+        else:
+            fractions = ", ".join(f"k={k}: {p:.4f}" for k, p in enumerate(customers_time.pmf()[:5]))
+            print(f"Fraction of time with k customers: {fractions}\n")
+        customer_quantiles = pmfQuantiles(customers_time.pmf(), QUANTILES)
+        print("Quantiles of the number of customers (time-average): " + ", ".join(f"p{100*p:g}: {k}" for p, k in zip(QUANTILES, customer_quantiles)) + "\n")
+
         # this block prints customers serviced, average waiting time and confidence interval
-        print(f"Number of customers serviced (samples): {len(waits)}")
-        print(f"Sampled average Waiting Time (waiting queue + server): {np.mean(waits):.4f}")
-        ciMin_w, ciMax_w = confidenceInterval(waits)
+        print(f"Number of customers serviced (samples): {waits_stats.count}")
+        print(f"Sampled average Waiting Time (waiting queue + server): {waits_stats.mean:.4f}")
+        ciMin_w, ciMax_w = waits_stats.confidenceInterval()
         print(f"Confidence Interval: [{ciMin_w:.4f}, {ciMax_w:.4f}]")
+        if(target_precision):
+            # The samples are correlated, so the check uses the interval of the sequential estimator
+            ciMin_w, ciMax_w = waits_sequential.confidenceInterval()
+            print(f"Confidence Interval ({ci_method}, {waits_sequential.count} units): [{ciMin_w:.4f}, {ciMax_w:.4f}]")
+        wait_quantiles = ", ".join(f"p{100*p:g}: {q:.4f}" for p, q in zip(QUANTILES, waits_quantiles.quantile(QUANTILES)))
+        if(markovian and stable):
+            # The time in the system of the M/M/1 queue is exponential with rate mu-lambda
+            expected_quantiles = ", ".join(f"{analytical.mm1WaitQuantile(lambda_gg1, mu_gg1, p):.4f}" for p in QUANTILES)
+            print(f"Quantiles of the Waiting Time (sketch): {wait_quantiles} (analytical -ln(1-p)/(mu-lambda): {expected_quantiles})")
+        else:
+            print(f"Quantiles of the Waiting Time (sketch): {wait_quantiles}")
 
-        if(not lambda_mm1<mu_mm1):
+        if(not stable):
             print("[Arrivals] are faster than [Services], queue will grow indefinitely long!\n")
-        else:
-            avg_wait_time = 1/(mu_mm1-lambda_mm1)
-            print(f"Analytical average Waiting Time (waiting queue + server) according to (1/(mu-lambda)): {avg_wait_time}")
+        elif(avg_wait_time is not None):
+            print(f"Analytical average Waiting Time (waiting queue + server) according to {formula_wait}: {avg_wait_time}")
             success = ciMin_w<=avg_wait_time<=ciMax_w
             if(success):
                 print(f"SUCCESS. Expected value {avg_wait_time} within confidence interval.\n")
             else:
                 print(f"FAILURE. Expected value {avg_wait_time} NOT within confidence interval.\n")
 
-    # This block shows bar graphs for each target metric
-    if(show_plots):
+    # This block shows bar graphs for each target metric (only possible when the samples were kept)
+    if(show_plots and keep_samples):
         #this block creates a bar graph of number of customers in the system per iteration of the simulator
-        print(f"Creating Customer in System bar graph with Lambda = {lambda_mm1}, Mu = {mu_mm1}, Rho = {rho_mm1}\n")
-        x_c = list(range(0, len(customers)))
-        plt.bar(x_c, customers, color ='blue',width = 0.7)
-        plt.xlabel("Iteration of simulator loop")
-        plt.ylabel("Number of customers in the system")
-        plt.title(f"Number of customers per iteration: Lambda = {lambda_mm1}, Mu = {mu_mm1}, Rho = {rho_mm1}")
-        plt.show()
+        print(f"Creating Customer in System bar graph with Lambda = {lambda_gg1}, Mu = {mu_gg1}, Rho = {rho_gg1}\n")
+        plotting.plotSeries(customers, f"{name} Number of customers per iteration: Lambda = {lambda_gg1}, Mu = {mu_gg1}, Rho = {rho_gg1}", "Iteration of simulator loop", "Number of customers in the system")
 
         #this block creates a bar graph of waiting time per customer serviced
-        print(f"Creating Waiting Time bar graph with Lambda = {lambda_mm1}, Mu = {mu_mm1}, Rho = {rho_mm1}\n")
-        x_w = list(range(0, len(waits)))
-        plt.bar(x_w, waits, color ='blue',width = 0.7)
-        plt.xlabel("Customers serviced")
-        plt.ylabel("Waiting time in seconds")
-        plt.title(f"Waiting time per customer serviced: Lambda = {lambda_mm1}, Mu = {mu_mm1}, Rho = {rho_mm1}")
-        plt.show()
-        
+        print(f"Creating Waiting Time bar graph with Lambda = {lambda_gg1}, Mu = {mu_gg1}, Rho = {rho_gg1}\n")
+        plotting.plotSeries(waits, f"{name} Waiting time per customer serviced: Lambda = {lambda_gg1}, Mu = {mu_gg1}, Rho = {rho_gg1}", "Customers serviced", "Waiting time in seconds")
+
+    if(not keep_samples):
+        return waits_stats, customers_stats
     return waits, customers
 
+# This function realizes a M/M/1 simulation (simulatorGG1 with exponential interarrival and service times)
+# The parameters are the same as simulatorGG1, plus the random number generator 'rng' (a new unseeded one when None)
+def simulatorMM1(lambda_mm1, mu_mm1, rng = None, **kwargs):
+    if(rng is None):
+        rng = np.random.default_rng()
+    return simulatorGG1(Exponential(lambda_mm1, rng), Exponential(mu_mm1, rng), name = "M/M/1", **kwargs)
+
+# This function realizes a M/D/1 simulation (simulatorGG1 with exponential interarrival times and fixed service time 1/mu)
+# The parameters are the same as simulatorGG1, plus the random number generator 'rng' (a new unseeded one when None)
+def simulatorMD1(lambda_md1, mu_md1, rng = None, **kwargs):
+    if(rng is None):
+        rng = np.random.default_rng()
+    return simulatorGG1(Exponential(lambda_md1, rng), Deterministic(1/mu_md1), name = "M/D/1", **kwargs)
+
+# Number of iterations of each replication of the sweep (6th case)
+SWEEPITERATIONS = 100000
+
+# This function runs one replication of the sweep: a M/M/1 simulation at the point (lambda, mu), returning its average waiting time
+# (defined at the top level so that the worker processes can run it)
+def sweepReplication(point, rng):
+    waits_stats, customers_stats = simulatorMM1(point[0], point[1], rng, show_metrics = False, max_iterations = SWEEPITERATIONS, keep_samples = False,
+                                                engine = "lindley")
+    return waits_stats.mean
+
 # Main function
 if __name__ == "__main__":
 
+    # Each case gets its own independent random number stream derived from the root seed
+    # (None draws a fresh root seed; setting the printed value repeats the whole run)
+    ROOT_SEED = None
+    streams = RandomStreams(ROOT_SEED)
+    print(f"Root seed: {streams.root_seed}")
+
+    # With a fixed root seed the results are saved in the result cache, so running the script again only simulates what changed
+    RESULTS = ResultCache() if ROOT_SEED is not None else None
+
     #'''
     # 1st Case: Lambda = 1, Mu = 2, Rho = 0.5
     print("\n1st Case: Lambda = 1, Mu = 2, Rho = 0.5")
-    wait_times, num_customers = simulatorMM1(lambda_mm1=1, mu_mm1=2, show_plots = True)
+    wait_times, num_customers = simulatorMM1(lambda_mm1=1, mu_mm1=2, rng = streams.stream(1), show_plots = True, cache = RESULTS)
     plotCDF(wait_times, num_customers)
     print("--------------------------------------------------------\n")
     #'''
@@ -156,7 +378,7 @@ if __name__ == "__main__":
     #'''
     # 2nd Case: Lambda = 2, Mu = 4, Rho = 0.5
     print("2nd Case: Lambda = 2, Mu = 4, Rho = 0.5")
-    wait_times, num_customers = simulatorMM1(lambda_mm1=2, mu_mm1=4, show_plots = True)
+    wait_times, num_customers = simulatorMM1(lambda_mm1=2, mu_mm1=4, rng = streams.stream(2), show_plots = True, cache = RESULTS)
     plotCDF(wait_times, num_customers)
     print("--------------------------------------------------------\n")
     #'''
@@ -164,7 +386,41 @@ if __name__ == "__main__":
     #'''
     # 3rd Case: Lamda = 4, Mu = 2, Rho = 2
     print("3rd Case: Lamda = 4, Mu = 2, Rho = 2")
-    wait_times, num_customers = simulatorMM1(lambda_mm1=4, mu_mm1=2, show_plots = True)
+    wait_times, num_customers = simulatorMM1(lambda_mm1=4, mu_mm1=2, rng = streams.stream(3), show_plots = True, cache = RESULTS)
     plotCDF(wait_times, num_customers)
     print("--------------------------------------------------------\n")
     #'''
+
+    #'''
+    # 4th Case: M/D/1, Lambda = 1, Mu = 2, Rho = 0.5
+    print("4th Case: M/D/1, Lambda = 1, Mu = 2, Rho = 0.5")
+    wait_times, num_customers = simulatorMD1(lambda_md1=1, mu_md1=2, rng = streams.stream(4), show_plots = True, cache = RESULTS)
+    plotCDF(wait_times, num_customers)
+    print("--------------------------------------------------------\n")
+    #'''
+
+    #'''
+    # 5th Case: M/G/1 with Erlang-4 and hyperexponential services, Lambda = 1, Mu = 2, Rho = 0.5
+    print("5th Case: M/E4/1 and M/H2/1, Lambda = 1, Mu = 2, Rho = 0.5")
+    rng = streams.stream(5)
+    simulatorGG1(Exponential(1, rng), Erlang(4, 2, rng), name = "M/E4/1", max_iterations = 1000000, engine = "lindley", cache = RESULTS)
+    rng = streams.stream(6)
+    simulatorGG1(Exponential(1, rng), HyperExponential([0.25, 0.75], [1, 3], rng), name = "M/H2/1", max_iterations = 1000000, engine = "lindley", cache = RESULTS)
+    print("--------------------------------------------------------\n")
+    #'''
+
+    #'''
+    # 6th Case: M/M/1 sweep, Mu = 1, Rho from 0.1 to 0.95
+    # The grid is refined where the average waiting time changes fastest (near Rho = 1) and each point runs replications
+    # until its confidence interval reaches 2% of the mean, so the high-variance points get more of them
+    print("6th Case: M/M/1 sweep, Mu = 1, Rho from 0.1 to 0.95")
+    points, stats = runSweep(sweepReplication, rhoGrid(np.linspace(0.1, 0.95, 8)), streams, max_replications = 1000, target_precision = 0.02,
+                             cache = RESULTS)
+    lambdas, mus = np.array(points).T
+    expected = analytical.mm1Wait(lambdas, mus)
+    printSweep(points, stats, expected, metric = "Avg wait")
+    plotting.plotEstimates(lambdas/mus, [point_stats.mean for point_stats in stats], [point_stats.halfWidth() for point_stats in stats],
+                           "M/M/1 average waiting time (waiting queue + server) per Rho: Mu = 1", "Rho", "Average waiting time",
+                           expected, "Analytical (1/(mu-lambda))")
+    print("--------------------------------------------------------\n")
+    #'''
@@ -1,27 +1,52 @@
+import math
 import numpy as np
-import matplotlib.pyplot as plt
+import os
+import sys
+from time import sleep, time
+
+# Makes the shared 'filas' package (at the root of the repository) importable from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from filas import plotting
+from filas.analytical import mm1RelaxationTime
+from filas.birth_death import snapshotTrace
+from filas.ctmc_likelihood import maximumLikelihood, readEventStatistics, sampleRates
+from filas.mcmc import GeometricPosterior, adaptScale, chainDiagnostics, effectiveSampleSize, metropolisHastings, proposeValues
+from filas.result_cache import ResultCache, codeVersion
+from filas.trace_files import TraceFollower, loadTrace, traceMetadata
+from filas.streams import RandomStreams
+
+# Root seed of the MCMC chains (None draws a fresh one). With a fixed root seed the chains are saved in the result cache,
+# so running the script again loads them instead of sampling them again.
+MCMC_SEED = None
+streams = RandomStreams(MCMC_SEED)
+RESULTS = ResultCache() if MCMC_SEED is not None else None
 
 
 # Load the trace from the file produced by the modified MM1 code
+# (filas.trace_files: a memory map of a binary trace, nothing is read until the values are used, or the parsed text trace)
 def load_trace(file_path):
-    trace = []
-    with open(file_path, "r") as file:
-        for line in file:
-            num_customers = int(line.strip())
-            #print(num_customers)
-            trace.append(num_customers)
-    return trace
+    return loadTrace(file_path)
 
 
-def likelihood(trace, rho):
+def sufficient_statistics(trace):
+    # The likelihood of the trace only depends on the number of observations m and on their sum y:
+    # the product of (1 - rho) * rho^n over the trace is (1 - rho)^m * rho^y.
+    # They are computed once per trace, so each step of the chain costs O(1) whatever the length of the trace.
+    trace = np.asarray(trace)
+    return len(trace), float(np.sum(trace))
+
+
+def log_likelihood(statistics, rho):
     # Implement the likelihood function to calculate the likelihood of the observed data given trace and rho.
-    # For an M/M/1 queue, the likelihood is the product of the probabilities of each observed trace value.
-    likelihood = 1.0
-    for num_customers in trace:
-        # Probability of observing 'num_customers' customers in the system at each step
-        prob_num_customers = (1 - rho) * (rho ** num_customers)
-        likelihood *= prob_num_customers
-    return likelihood
+    # For an M/M/1 queue, the likelihood is the product of the probabilities of each observed trace value, (1 - rho) * rho^n,
+    # computed in log space from the sufficient statistics (m, y): m * log(1 - rho) + y * log(rho).
+    # The product itself underflows to 0 for traces of a few thousand observations; its logarithm does not.
+    m, y = statistics
+    if not (0 <= rho < 1):
+        return -math.inf
+    if rho == 0:
+        return 0.0 if y == 0 else -math.inf
+    return m * math.log1p(-rho) + y * math.log(rho)
 
 
 def prior(rho):
@@ -32,72 +57,216 @@ def prior(rho):
     return 0.0
 
 
-def proposal(current_rho):
+# prior() as a Beta(alpha, beta) distribution: the uniform prior on [0, 1] is Beta(1, 1) (None if prior() is changed to a prior that is not a Beta)
+PRIOR_BETA = (1, 1)
+
+# Sampler of the posterior: "auto" draws independent samples of the exact posterior when the case is conjugate (see conjugate_posterior),
+# "mcmc" always runs the Metropolis-Hastings chains
+SAMPLER = "auto"
+
+
+def conjugate_posterior(trace):
+    # The geometric likelihood (1 - rho)^m * rho^y with a Beta prior has a Beta posterior (filas.mcmc.GeometricPosterior), which is
+    # sampled directly (independent samples, no burn-in) and has a closed-form mean and variance.
+    # Returns it when the sampler is "auto", prior() is a Beta distribution and the trace holds numbers of customers (non-negative values);
+    # None otherwise, and the posterior is sampled by Metropolis-Hastings.
+    trace = np.asarray(trace)
+    if SAMPLER != "auto" or PRIOR_BETA is None or len(trace) == 0 or np.min(trace) < 0:
+        return None
+    m, y = sufficient_statistics(trace)
+    return GeometricPosterior(m, y, *PRIOR_BETA)
+
+
+def proposal(current_rho, rng, proposal_sigma = 0.01, kind = "normal"):
     # Implement the proposal function to generate a new proposal for rho.
     # For example, you can use a normal distribution centered at the current_rho.
-    # Return the proposed rho value.
-    proposal_sigma = 0.01  # You can adjust the proposal distribution variance
-
-    return np.random.normal(current_rho, proposal_sigma)
+    # Return the proposed rho value, with the log of the Hastings correction of the proposal (filas.mcmc.proposeValues):
+    # kind = "normal" draws rho from the normal distribution (values outside [0, 1] are rejected by prior()),
+    # kind = "reflect" reflects the draw at 0 and 1, kind = "logit" moves log(rho/(1-rho)) instead, so rho stays inside [0, 1].
+    # proposal_sigma is the standard deviation of the normal step (tuned by metropolis_hastings in adaptive mode).
+    proposed_rho, log_correction = proposeValues(current_rho, rng.normal(0, proposal_sigma), kind)
+    return float(proposed_rho), float(log_correction)
 
 
-def acceptance_ratio(trace, current_rho, proposed_rho):
+def acceptance_ratio(statistics, current_rho, proposed_rho, log_correction = 0.0):
     # Calculate the acceptance ratio for the Metropolis-Hastings algorithm.
-    current_likelihood = likelihood(trace, current_rho)
-    proposed_likelihood = likelihood(trace, proposed_rho)
-
+    # The ratio of the posteriors is the exponential of the difference of their logarithms
+    # (plus the log of the Hastings correction of an asymmetric proposal).
     current_prior = prior(current_rho)
     proposed_prior = prior(proposed_rho)
+    if (current_prior == 0) or (proposed_prior == 0):
+        return 0
 
-    if (current_likelihood == 0) or (current_prior == 0):
-        acceptance = 0
-    else:
-        acceptance = (proposed_likelihood * proposed_prior)/(current_likelihood * current_prior)
+    current_log_posterior = log_likelihood(statistics, current_rho) + math.log(current_prior)
+    proposed_log_posterior = log_likelihood(statistics, proposed_rho) + math.log(proposed_prior)
 
-    return min(1, acceptance)
+    if current_log_posterior == -math.inf:
+        return 1 if proposed_log_posterior > -math.inf else 0
+    log_acceptance = proposed_log_posterior - current_log_posterior + log_correction
+    return 1 if log_acceptance >= 0 else math.exp(log_acceptance)
 
 
-def metropolis_hastings(trace, iterations):
+def metropolis_hastings(trace, iterations, rng = None, adaptive = False, kind = "normal", burn_in = 1000, target_acceptance = 0.44):
+    # In adaptive mode, the standard deviation of the proposals is tuned during the first burn_in iterations towards the target
+    # acceptance rate (filas.mcmc.adaptScale) and then frozen; kind selects the proposal (see proposal()).
+    if rng is None:
+        rng = np.random.default_rng()
+    statistics = sufficient_statistics(trace)
     rho_values = []
-    current_rho = np.random.uniform(0, 1)  # Initialize rho randomly within [0, 1]
+    current_rho = rng.uniform(0, 1)  # Initialize rho randomly within [0, 1]
     #current_rho = 0.2
     #current_rho = 0.9
     #current_rho = 0.5
+    log_sigma = math.log(0.01)
 
-    for _ in range(iterations):
+    for iteration in range(iterations):
         # Propose a new rho using the proposal function
-        proposed_rho = proposal(current_rho)
+        proposed_rho, log_correction = proposal(current_rho, rng, math.exp(log_sigma), kind)
 
         # Calculate the acceptance ratio
-        accept_prob = acceptance_ratio(trace, current_rho, proposed_rho)
+        accept_prob = acceptance_ratio(statistics, current_rho, proposed_rho, log_correction)
 
         # Accept or reject the proposed rho based on the acceptance ratio
-        if np.random.rand() < accept_prob:
+        if rng.random() < accept_prob:
             current_rho = proposed_rho
 
+        # Tune the proposal during the burn-in
+        if adaptive and iteration < burn_in:
+            log_sigma = adaptScale(log_sigma, accept_prob, iteration, target_acceptance)
+
         rho_values.append(current_rho)
 
     return rho_values
 
 
-# Load the observed data (trace) from the input file
-trace = load_trace("mm1_trace.txt")
+# Proposals of the chains: adaptive scale (tuned during the burn-in) and kind of proposal ("normal", "reflect" or "logit")
+ADAPTIVE = True
+PROPOSAL_KIND = "reflect"
+
+# Number of chains of each case in the batched job, target effective sample size of each case (the job stops once every case reaches it)
+# and number of initial iterations discarded from the samples and the diagnostics (and used to tune the proposals)
+CHAINS_PER_CASE = 4
+TARGET_ESS = 2000
+BURN_IN = 1000
+
+
+def cached_metropolis_hastings(trace, iterations, chain):
+    # Runs metropolis_hastings with the random number stream 'chain' of the root seed.
+    # When the result cache is enabled, the samples are saved under the sufficient statistics of the trace (the chain only depends on them),
+    # the number of iterations, the options of the proposals, the root seed and the chain, and loaded from it when the same chain was already run.
+    rng = streams.stream(chain)
+    options = {"adaptive": ADAPTIVE, "kind": PROPOSAL_KIND, "burn_in": BURN_IN}
+    if RESULTS is None:
+        return metropolis_hastings(trace, iterations, rng, **options)
+    config = {"sampler": "metropolis_hastings", "code": [codeVersion(metropolis_hastings), codeVersion(proposeValues)],
+              "statistics": sufficient_statistics(trace), "iterations": iterations, **options, "root_seed": streams.root_seed, "chain": chain}
+    return RESULTS.cached(config, lambda: {"rho_samples": metropolis_hastings(trace, iterations, rng, **options)})["rho_samples"]
+
+
+def log_posteriors(statistics):
+    # Log posterior of rho of each chain of the batched job (uniform prior), for the sufficient statistics (m, y) of the trace of each chain
+    m, y = np.asarray(statistics, dtype = float).T
+    def log_posterior(rho):
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            values = m * np.log1p(-rho) + np.where(y > 0, y * np.log(rho), 0.0)
+        return np.where((0 <= rho) & (rho < 1), values, -np.inf)
+    return log_posterior
+
+
+def batched_metropolis_hastings(traces, iterations, stream):
+    # Runs CHAINS_PER_CASE chains for each trace together (filas.mcmc.metropolisHastings), with the random number stream 'stream'
+    # of the root seed, starting from random values of rho; returns the samples (iterations x chains), the acceptance rate of each chain
+    # and the chains of each trace. When the result cache is enabled, the job is saved under the sufficient statistics of the traces.
+    statistics = np.repeat([sufficient_statistics(trace) for trace in traces], CHAINS_PER_CASE, axis = 0)
+    groups = [np.arange(k * CHAINS_PER_CASE, (k + 1) * CHAINS_PER_CASE) for k in range(len(traces))]
+    def run():
+        rng = streams.stream(stream)
+        samples, acceptance, scales = metropolisHastings(log_posteriors(statistics), rng.uniform(0, 1, len(statistics)), iterations, rng,
+                                                         groups = groups, target_ess = TARGET_ESS, burn_in = BURN_IN,
+                                                         proposal = PROPOSAL_KIND, adapt = ADAPTIVE)
+        return {"samples": samples, "acceptance": acceptance}
+    if RESULTS is None:
+        saved = run()
+    else:
+        config = {"sampler": "batched_metropolis_hastings", "code": [codeVersion(metropolis_hastings), codeVersion(metropolisHastings)],
+                  "statistics": statistics, "iterations": iterations, "target_ess": TARGET_ESS, "burn_in": BURN_IN,
+                  "adaptive": ADAPTIVE, "kind": PROPOSAL_KIND,
+                  "root_seed": streams.root_seed, "stream": stream}
+        saved = RESULTS.cached(config, run)
+    return saved["samples"], saved["acceptance"], groups
+
+
+# Follow mode: after the cases, the trace file keeps being read as it grows (e.g. written by a running simulator) and the posterior of rho
+# is updated with each new block of observations, every FOLLOW_INTERVAL seconds, until Ctrl+C. Without a conjugate posterior, each update
+# continues the Metropolis-Hastings chain for FOLLOW_ITERATIONS iterations from its last value and proposal scale.
+FOLLOW = False
+FOLLOW_INTERVAL = 1.0
+FOLLOW_ITERATIONS = 2000
+
+
+def follow_posterior(file_path, interval = FOLLOW_INTERVAL, max_updates = None):
+    # Tails the trace (filas.trace_files.TraceFollower) and updates the posterior with the new observations only: the sufficient statistics
+    # (m, y) are accumulated chunk by chunk, so the cost of an update is proportional to the new data and the memory is constant.
+    # The conjugate posterior is updated in O(1); otherwise the chain is warm-started from its previous state, re-tuning its proposal
+    # during the first tenth of the iterations (the posterior gets narrower as the trace grows).
+    # Returns the sufficient statistics and the last posterior mean after max_updates updates (None: until Ctrl+C).
+    follower = TraceFollower(file_path)
+    rng = streams.stream(5)
+    m, y = 0, 0.0
+    conjugate = True
+    current_rho, scale = rng.uniform(0, 1), 0.01
+    mean = math.nan
+    updates = 0
+    try:
+        while max_updates is None or updates < max_updates:
+            new = 0
+            for chunk in follower.read():
+                m += len(chunk)
+                y += float(np.sum(chunk))
+                new += len(chunk)
+                conjugate = conjugate and conjugate_posterior(chunk) is not None
+            if new:
+                updates += 1
+                if conjugate:
+                    posterior = GeometricPosterior(m, y, *PRIOR_BETA)
+                    mean, variance = posterior.mean(), posterior.variance()
+                else:
+                    samples, _, scales = metropolisHastings(log_posteriors([(m, y)]), [current_rho], FOLLOW_ITERATIONS, rng, proposal_sigma = scale,
+                                                            burn_in = FOLLOW_ITERATIONS // 10, proposal = PROPOSAL_KIND, adapt = ADAPTIVE)
+                    current_rho, scale = samples[-1, 0], scales[0]
+                    kept = samples[FOLLOW_ITERATIONS // 10:, 0]
+                    mean, variance = np.mean(kept), np.var(kept)
+                print(f"[{m} observations, {new} new] posterior mean of ρ {mean:.4f}, variance {variance:.3e}")
+            if max_updates is None or updates < max_updates:
+                sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    return (m, y), mean
+
+
+# Load the observed data (trace) from the input file: the binary trace written by trabFinal_3-MM1.py, or the text trace
+TRACE_FILE = "mm1_trace.bin" if os.path.exists("mm1_trace.bin") else "mm1_trace.txt"
+trace = load_trace(TRACE_FILE)
+print(f"Trace {TRACE_FILE}: {len(trace)} observations {traceMetadata(TRACE_FILE)}")
 
 # Number of MCMC iterations
 iterations = 10000
 
-# Perform MCMC to estimate rho
-rho_samples = metropolis_hastings(trace, iterations)
+# Perform MCMC to estimate rho (the first BURN_IN samples, taken while the chain converges and its proposal is tuned, are discarded)
+# or, in the conjugate case, draw as many independent samples of the exact posterior
+start_time = time()
+posterior = conjugate_posterior(trace)
+if posterior is not None:
+    rho_samples = posterior.sample(iterations - BURN_IN, streams.stream(0))
+else:
+    rho_samples = cached_metropolis_hastings(trace, iterations, chain = 0)[BURN_IN:]
+duration = time() - start_time
 
 
 #-----------------------------------------------------------------------------------------
 
 # Generate a histogram to show the estimated distribution of rho
-plt.hist(rho_samples, bins=30, density=True, alpha=0.6)
-plt.xlabel("Utilization Factor (ρ)")
-plt.ylabel("Density")
-plt.title("Estimated Distribution of Utilization Factor (ρ)")
-plt.show()
+plotting.plotHistogram(rho_samples, "Estimated Distribution of Utilization Factor (ρ)", "Utilization Factor (ρ)", "Density", bins=30)
 
 # Calculate and print the mean and variance of the estimated rho values
 mean_rho = np.mean(rho_samples)
@@ -105,99 +274,109 @@ var_rho = np.var(rho_samples)
 estimated_rho = rho_samples[-1]
 print(f"Estimated Value of ρ: {estimated_rho:.4f}")
 print(f"Estimated Mean of ρ: {mean_rho:.4f}")
-print(f"Estimated Variance of ρ: {var_rho:.4f}")
+print(f"Estimated Variance of ρ: {var_rho:.6f}")
+if posterior is not None:
+    print(f"Exact posterior Beta({posterior.alpha:g}, {posterior.beta:g}): mean {posterior.mean():.4f}, variance {posterior.variance():.6f}")
+    print(f"Independent samples: {len(rho_samples)} ({duration:.4f} seconds)")
+else:
+    print(f"Effective sample size: {effectiveSampleSize(rho_samples):.0f} of {len(rho_samples)} samples ({duration:.3f} seconds)")
+print(f"Root seed of the chains: {streams.root_seed}")
 
 
 #-----------------------------------------------------------------------------------------
 
+## Cases a) to d): the trace of each case is built first; in the conjugate case the exact posterior of each case is sampled directly,
+## otherwise the chains of the four cases run together in one batched job
+## (filas.mcmc.metropolisHastings: CHAINS_PER_CASE chains per case, advanced as NumPy arrays, stopping once every case reaches TARGET_ESS)
+
 ## Case a) m = 100, y = ∑vi = 25
 m_a = 100
 y_a = 25
-v_a = np.ones(m_a) * (y_a // m_a)  # Create an array with equal values y/m
-rho_samples_a = metropolis_hastings(v_a, iterations=10000)
-
-# Generate a histogram to show the estimated distribution of rho for case a)
-plt.hist(rho_samples_a, bins=30, density=True, alpha=0.6)
-plt.xlabel("Utilization Factor (ρ)")
-plt.ylabel("Density")
-plt.title("Estimated Distribution of Utilization Factor (ρ) - Case a")
-plt.show()
+v_a = np.ones(m_a) * (y_a / m_a)  # Create an array with equal values y/m
 
 
 ## Case b) m = 100, y = ∑vi = 100
 m_b = 100
 y_b = 100
 v_b = np.ones(m_b) * (y_b // m_b)  # Create an array with equal values y/m
-rho_samples_b = metropolis_hastings(v_b, iterations=10000)
-
-# Generate a histogram to show the estimated distribution of rho for case b)
-plt.hist(rho_samples_b, bins=30, density=True, alpha=0.6)
-plt.xlabel("Utilization Factor (ρ)")
-plt.ylabel("Density")
-plt.title("Estimated Distribution of Utilization Factor (ρ) - Case b")
-plt.show()
 
 
 #-----------------------------------------------------------------------------------------
 
+## Cases c) and d) simulate a M/M/1 queue with lambda = ρ and mu = 1 and observe its number of customers N(t) at Poisson times
+## (filas.birth_death.snapshotTrace, vectorized): the values seen at the events (embedded chain) do not follow the stationary
+## distribution (1 - ρ) * ρ^n that the likelihood assumes, the values seen at independent times do. The observations are spaced by
+## SNAPSHOT_SPACING relaxation times of the queue, so that they are also nearly independent, as the likelihood assumes.
+SNAPSHOT_SPACING = 3
+
 ## c) ρ = 4/5, gerar trace via simulação, obter m e y, e extrair amostras de ρ usando MCMC
 m_c = 100
 rho_c = 4/5
 
-trace_c = []
-np.random.seed(42)
-simultime = 0
-n = 0
-for _ in range(m_c):
-    time_of_arrival_c = np.random.exponential(1 / (1 - rho_c))
-    time_of_departure_c = np.random.exponential(1 / rho_c)
-
-    if (n == 0 or time_of_arrival_c < time_of_departure_c):
-        simultime += time_of_arrival_c
-        n += 1
-    else:
-        simultime += time_of_departure_c
-        n -= 1
-    trace_c.append(n)
-
-# Perform MCMC to estimate rho for case c
-iterations = 10000
-rho_samples_c = metropolis_hastings(trace_c, iterations)
-
-# Generate a histogram to show the estimated distribution of rho for case c
-plt.hist(rho_samples_c, bins=30, density=True, alpha=0.6)
-plt.xlabel("Utilization Factor (ρ)")
-plt.ylabel("Density")
-plt.title("Estimated Distribution of Utilization Factor (ρ) - Case c")
-plt.show()
+trace_c = snapshotTrace(rho_c, 1, m_c, SNAPSHOT_SPACING * mm1RelaxationTime(rho_c, 1), rng=np.random.default_rng(42))
 
 
 ## d) ρ = 1/2, gerar trace via simulação, obter m e y, e extrair amostras de ρ usando MCMC
 m_d = 100
 rho_d = 1/2
 
-trace_d = []
-np.random.seed(43)
-simultime = 0
-n = 0
-for _ in range(m_d):
-    time_of_arrival_d = np.random.exponential(1 / (1 - rho_d))
-    time_of_departure_d = np.random.exponential(1 / rho_d)
-
-    if (n == 0 or time_of_arrival_d < time_of_departure_d):
-        simultime += time_of_arrival_d
-        n += 1
-    else:
-        simultime += time_of_departure_d
-        n -= 1
-    trace_d.append(n)
-
-# Perform MCMC to estimate rho for case d
-rho_samples_d = metropolis_hastings(trace_d, iterations)
-
-# Generate a histogram to show the estimated distribution of rho for case d
-plt.hist(rho_samples_d, bins=30, density=True, alpha=0.6)
-plt.xlabel("Utilization Factor (ρ)")
-plt.ylabel("Density")
-plt.title("Estimated Distribution of Utilization Factor (ρ) - Case d")
-plt.show()
+trace_d = snapshotTrace(rho_d, 1, m_d, SNAPSHOT_SPACING * mm1RelaxationTime(rho_d, 1), rng=np.random.default_rng(43))
+
+
+# Estimate rho for the four cases: exact posteriors, or MCMC in one batched job
+cases = {"a": v_a, "b": v_b, "c": trace_c, "d": trace_d}
+posteriors = [conjugate_posterior(case_trace) for case_trace in cases.values()]
+
+if all(posterior is not None for posterior in posteriors):
+    rng = streams.stream(1)
+    for (case, case_trace), posterior in zip(cases.items(), posteriors):
+        m, y = sufficient_statistics(case_trace)
+        rho_samples_case = posterior.sample(iterations - BURN_IN, rng)
+        print(f"Case {case}) m = {m}, y = {y:g}: mean of ρ {np.mean(rho_samples_case):.4f}, variance {np.var(rho_samples_case):.6f}, "
+              f"exact posterior Beta({posterior.alpha:g}, {posterior.beta:g}) mean {posterior.mean():.4f}, variance {posterior.variance():.6f}")
+
+        # Generate a histogram to show the estimated distribution of rho for each case
+        plotting.plotHistogram(rho_samples_case, f"Estimated Distribution of Utilization Factor (ρ) - Case {case}", "Utilization Factor (ρ)", "Density", bins=30)
+    print(f"Independent samples per case: {iterations - BURN_IN}")
+
+else:
+    samples, acceptance, groups = batched_metropolis_hastings(list(cases.values()), iterations=10000, stream=1)
+    diagnostics = chainDiagnostics(samples[BURN_IN:], groups)
+
+    for (case, case_trace), group, (r_hat, ess) in zip(cases.items(), groups, diagnostics):
+        m, y = sufficient_statistics(case_trace)
+        rho_samples_case = samples[BURN_IN:, group].ravel()
+        print(f"Case {case}) m = {m}, y = {y:g}: mean of ρ {np.mean(rho_samples_case):.4f}, variance {np.var(rho_samples_case):.6f}, "
+              f"R-hat {r_hat:.4f}, ESS {ess:.0f}, acceptance rate {np.mean(acceptance[group]):.3f}")
+
+        # Generate a histogram to show the estimated distribution of rho for each case
+        plotting.plotHistogram(rho_samples_case, f"Estimated Distribution of Utilization Factor (ρ) - Case {case}", "Utilization Factor (ρ)", "Density", bins=30)
+    print(f"Iterations per chain: {len(samples)} ({CHAINS_PER_CASE} chains per case, the first {BURN_IN} discarded)")
+
+
+#-----------------------------------------------------------------------------------------
+
+## Joint estimation of lambda and mu from the timestamped event trace written by trabFinal_3-MM1.py (filas.ctmc_likelihood):
+## the number of customers alone only identifies rho, the times of the arrivals and departures identify both rates
+EVENT_TRACE_FILE = "mm1_events.bin"
+if os.path.exists(EVENT_TRACE_FILE):
+    event_statistics = readEventStatistics(EVENT_TRACE_FILE)
+    (lambda_mle, mu_mle), (lambda_error, mu_error) = maximumLikelihood(event_statistics)
+    print(f"\nEvent trace {EVENT_TRACE_FILE}: {event_statistics.arrivals} arrivals, {event_statistics.departures} departures, "
+          f"observed time {event_statistics.observed_time:.2f}, busy time {event_statistics.busy_time:.2f}")
+    print(f"Maximum likelihood: λ = {lambda_mle:.4f} ± {lambda_error:.4f}, μ = {mu_mle:.4f} ± {mu_error:.4f}, ρ = {lambda_mle / mu_mle:.4f}")
+
+    rate_samples, rate_acceptance = sampleRates(event_statistics, iterations, streams.stream(6), burn_in = BURN_IN, target_ess = TARGET_ESS)
+    (r_hat, ess), = chainDiagnostics(rate_samples[BURN_IN:], [np.arange(rate_samples.shape[1])])
+    lambda_samples, mu_samples = rate_samples[BURN_IN:, :, 0].ravel(), rate_samples[BURN_IN:, :, 1].ravel()
+    print(f"Posterior (2-D Metropolis-Hastings): mean of λ {np.mean(lambda_samples):.4f}, mean of μ {np.mean(mu_samples):.4f}, "
+          f"mean of ρ {np.mean(lambda_samples / mu_samples):.4f}, R-hat {r_hat:.4f}, ESS {ess:.0f}, acceptance rate {np.mean(rate_acceptance):.3f}")
+    plotting.plotHistogram(lambda_samples / mu_samples, "Estimated Distribution of Utilization Factor (ρ) - Event trace", "Utilization Factor (ρ)", "Density", bins=30)
+
+
+#-----------------------------------------------------------------------------------------
+
+## Follow mode: updates the posterior of rho as the trace grows
+if FOLLOW:
+    print(f"Following {TRACE_FILE} (Ctrl+C stops)")
+    follow_posterior(TRACE_FILE)
@@ -4,9 +4,16 @@
 
 import numpy as np
 import math
+import os
+import sys
+
+# Makes the shared 'filas' package (at the root of the repository) importable from this folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from filas import trace_files, tracing
 
 # Sets the random number generator seed to 1
-np.random.seed(1)
+SEED = 1
+np.random.seed(SEED)
 
 # Initializes the number of customers in the system and the simulation time 
 n = 0
@@ -36,6 +43,18 @@ def confidenceInterval(samples, mean, std, precision):
     maxCI = mean + (precision * (std / math.sqrt(samples) ))
     return minCI, maxCI
 
+# Event trace: arrivals and departures are buffered and printed in bulk instead of one print() per event
+# (TRACE_LEVEL = tracing.OFF disables it; a path such as "trace.csv" or "trace.bin" as sink writes the events to a file)
+TRACE_LEVEL = tracing.EVENTS
+tracer = tracing.EventTracer(TRACE_LEVEL, sink = sys.stdout)
+trace = tracer.recorder()
+
+# Timestamped event trace for the joint estimation of lambda and mu (trabFinal_3-MCMC.py): every arrival and departure is written
+# as a binary record (time, type, customers before and after, filas.tracing) to EVENT_TRACE_FILE (None disables it)
+EVENT_TRACE_FILE = "mm1_events.bin"
+event_tracer = tracing.EventTracer(tracing.EVENTS, sink = EVENT_TRACE_FILE) if EVENT_TRACE_FILE else None
+record_event = event_tracer.recorder() if event_tracer is not None else None
+
 MAXITERATION = 1000
 # Starts the main simulation loop, which iterates MAXITERATION times or until there are no more events in the queue.
 for i in range(MAXITERATION):
@@ -46,19 +65,24 @@ for i in range(MAXITERATION):
 
     if (n==0 or time_of_arrival < time_of_departure):
         simultime += time_of_arrival
-        print(f"[{simultime:08.4f}] {'arrival':>10}, {n} => {n + 1}")       # This block prints out a message indicating the arrival,
+        if(trace): trace(simultime, tracing.ARRIVAL, n, n + 1)              # This block traces the arrival,
+        if(record_event): record_event(simultime, tracing.ARRIVAL, n, n + 1)
         n += 1                                                              # updates the number of customers in the system
         customers.append(n)                                                 # appends current number of customers
         arrivals.append(simultime)                                          # appends arrival of current customer
 
     else:
         simultime += time_of_departure
-        print(f"[{simultime:08.4f}] {'departure':>10}, {n} => {n - 1}")     # This block prints out a message indicating the departure,
+        if(trace): trace(simultime, tracing.DEPARTURE, n, n - 1)            # This block traces the departure,
+        if(record_event): record_event(simultime, tracing.DEPARTURE, n, n - 1)
         n -= 1                                                              # updates the number of customers in the system
         customers.append(n)                                                 # appends current number of customers
         waits.append(simultime-arrivals[0])                                 # appends waiting time of departing customer
         arrivals.pop(0)
 
+tracer.close()
+if(event_tracer is not None):
+    event_tracer.close()
 print(f"\nMax iteration number ({MAXITERATION}) reached. End of simulation\n")
 
 # this block gets the number of customeres serviced, average waiting time and standard deviation of waiting time
@@ -82,7 +106,8 @@ print(f"Average number of customers in the system: {mean_c:.2f} customers")
 ciMin_c, ciMax_c = confidenceInterval(samples_c, mean_c, std_c, precision_c)
 print(f"Confidence Interval: [{ciMin_c:.2f}, {ciMax_c:.2f}]")
 
-# Save the trace to a file for the MCMC code to read
-with open("mm1_trace.txt", "w") as file:
-    for num_customers in customers:
-        file.write(f"{num_customers}\n")
+# Save the trace to a file for the MCMC code to read: in the binary format (filas.trace_files), with the parameters of the run in its header,
+# and in the legacy text format (one number per line)
+trace_files.writeTrace("mm1_trace.bin", customers, {"model": "M/M/1", "arrival_mean": tax_arrival, "service_mean": tax_departure,
+                                                    "seed": SEED, "iterations": MAXITERATION})
+trace_files.writeTextTrace("mm1_trace.txt", customers)
@@ -0,0 +1,3 @@
+# filas
+# Shared queueing simulation code used by the scripts of each Trabalho
+# Scripts import the modules of this package directly (e.g. "from filas.event_queue import EventQueue")
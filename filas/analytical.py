@@ -0,0 +1,153 @@
+# Analytical values (the "oracle" the simulators are checked against)
+# Closed forms of the M/M/1, M/D/1 and M/G/1 (Pollaczek-Khinchine) queues, of the busy period and of the first-passage times
+# of the M/M/1 chain, and its stationary distribution. Every function accepts scalars or NumPy arrays of parameters:
+# -> scalar calls are memoized (the same (lambda, mu) is asked for again at every check of a sweep) and return a float
+# -> array calls are evaluated for the whole grid in one vectorized expression, with the usual NumPy broadcasting
+#    (e.g. mm1Customers(lambdas[:, None], mus[None, :]) gives the table of L for every pair)
+# Unstable parameters (rho >= 1) have no stationary regime: the means are math.inf and the pmf is 0.
+# Notation: lambda (arrival rate), mu (service rate), rho = lambda/mu, E[S] and E[S^2] the first two moments of the service time.
+
+import math
+from functools import lru_cache, wraps
+import numpy as np
+
+
+# This decorator makes a formula evaluable over grids and memoizes its scalar calls
+def formula(function):
+
+    cached = lru_cache(maxsize = None)(function)
+
+    @wraps(function)
+    def evaluate(*args):
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            if(all(np.ndim(arg) == 0 for arg in args)):
+                return float(cached(*(np.asarray(arg).item() for arg in args)))
+            return function(*(np.asarray(arg, dtype = float) for arg in args))
+
+    evaluate.cache_info = cached.cache_info
+    evaluate.cache_clear = cached.cache_clear
+    return evaluate
+
+
+# ---------------------------------------------------------------- M/M/1
+
+# Utilization rho = lambda/mu
+@formula
+def utilization(lambda_mm1, mu_mm1):
+    return np.divide(lambda_mm1, mu_mm1)
+
+
+# Average number of customers in the system, L = rho/(1-rho)
+@formula
+def mm1Customers(lambda_mm1, mu_mm1):
+    rho = np.divide(lambda_mm1, mu_mm1)
+    return np.where(rho < 1, rho/(1 - rho), math.inf)
+
+
+# Average time in the system (waiting queue + server), W = 1/(mu-lambda)
+@formula
+def mm1Wait(lambda_mm1, mu_mm1):
+    return np.where(np.less(lambda_mm1, mu_mm1), 1/np.subtract(mu_mm1, lambda_mm1), math.inf)
+
+
+# Average time in the waiting queue, Wq = rho/(mu-lambda)
+@formula
+def mm1QueueWait(lambda_mm1, mu_mm1):
+    return np.where(np.less(lambda_mm1, mu_mm1), np.divide(lambda_mm1, mu_mm1)/np.subtract(mu_mm1, lambda_mm1), math.inf)
+
+
+# Quantile of the time in the system at probability p: W is exponential with rate mu-lambda, so -ln(1-p)/(mu-lambda)
+@formula
+def mm1WaitQuantile(lambda_mm1, mu_mm1, p):
+    return np.where(np.less(lambda_mm1, mu_mm1), -np.log1p(-np.asarray(p))/np.subtract(mu_mm1, lambda_mm1), math.inf)
+
+
+# Stationary probability of k customers in the system, (1-rho)*rho^k
+@formula
+def mm1Pmf(lambda_mm1, mu_mm1, k):
+    rho = np.divide(lambda_mm1, mu_mm1)
+    return np.where(rho < 1, (1 - rho)*np.power(rho, k), 0.0)
+
+
+# Relaxation time of the number of customers, 1/(sqrt(mu)-sqrt(lambda))^2: the time scale of the decay of its autocorrelation
+# (observations much further apart than it are nearly independent)
+@formula
+def mm1RelaxationTime(lambda_mm1, mu_mm1):
+    return np.where(np.less(lambda_mm1, mu_mm1), 1/np.square(np.sqrt(mu_mm1) - np.sqrt(lambda_mm1)), math.inf)
+
+
+# ---------------------------------------------------------------- M/G/1 and M/D/1
+
+# Average time in the system given the first two moments of the service time (Pollaczek-Khinchine),
+# W = E[S] + lambda*E[S^2]/(2(1-rho)), with rho = lambda*E[S]
+@formula
+def mg1Wait(lambda_mg1, mean_service, second_moment_service):
+    rho = np.multiply(lambda_mg1, mean_service)
+    return np.where(rho < 1, mean_service + lambda_mg1*second_moment_service/(2*(1 - rho)), math.inf)
+
+
+# Average time in the waiting queue (Pollaczek-Khinchine), Wq = W - E[S]
+@formula
+def mg1QueueWait(lambda_mg1, mean_service, second_moment_service):
+    return mg1Wait(lambda_mg1, mean_service, second_moment_service) - mean_service
+
+
+# Average number of customers in the system (Little's law), L = lambda*W
+@formula
+def mg1Customers(lambda_mg1, mean_service, second_moment_service):
+    return lambda_mg1*mg1Wait(lambda_mg1, mean_service, second_moment_service)
+
+
+# Average time in the system of the M/D/1 queue (service time 1/mu, so E[S^2] = 1/mu^2), W = 1/mu + rho/(2mu(1-rho))
+@formula
+def md1Wait(lambda_md1, mu_md1):
+    return mg1Wait(lambda_md1, 1/mu_md1, 1/mu_md1**2)
+
+
+# Average number of customers in the system of the M/D/1 queue, L = rho + rho^2/(2(1-rho))
+@formula
+def md1Customers(lambda_md1, mu_md1):
+    return mg1Customers(lambda_md1, 1/mu_md1, 1/mu_md1**2)
+
+
+# ---------------------------------------------------------------- Busy periods and first passages
+
+# Average busy period of the M/G/1 queue started by one customer, E[B] = E[S]/(1-rho)
+@formula
+def mg1BusyPeriod(lambda_mg1, mean_service):
+    rho = np.multiply(lambda_mg1, mean_service)
+    return np.where(rho < 1, mean_service/(1 - rho), math.inf)
+
+
+# Second moment of the busy period of the M/G/1 queue, E[B^2] = E[S^2]/(1-rho)^3
+@formula
+def mg1BusyPeriodSecondMoment(lambda_mg1, mean_service, second_moment_service):
+    rho = np.multiply(lambda_mg1, mean_service)
+    return np.where(rho < 1, second_moment_service/(1 - rho)**3, math.inf)
+
+
+# Average busy period of the M/M/1 queue, E[B] = (1/mu)/(1-rho)
+@formula
+def busyPeriod(lambda_mm1, mu_mm1):
+    return mg1BusyPeriod(lambda_mm1, 1/mu_mm1)
+
+
+# Variance of the busy period of the M/M/1 queue, Var[B] = E[B^2] - E[B]^2 = (1+rho)/(mu^2(1-rho)^3)
+@formula
+def busyPeriodVariance(lambda_mm1, mu_mm1):
+    rho = np.divide(lambda_mm1, mu_mm1)
+    return np.where(rho < 1, (1 + rho)/(mu_mm1**2*(1 - rho)**3), math.inf)
+
+
+# Average time the M/M/1 queue takes to go from 'start' to 'target' customers (target < start): above the target, going down
+# one level is a busy period, so it is the sum of start - target independent busy periods, (start-target)*E[B]
+# (e.g. E(B_C) = C*E[B] until the system empties and E(U_C) = (C-1)*E[B] until the last customer)
+@formula
+def firstPassage(lambda_mm1, mu_mm1, start, target):
+    return np.subtract(start, target)*busyPeriod(lambda_mm1, mu_mm1)
+
+
+# Variance of the first-passage time from 'start' to 'target' customers, (start-target)*Var[B]
+@formula
+def firstPassageVariance(lambda_mm1, mu_mm1, start, target):
+    return np.subtract(start, target)*busyPeriodVariance(lambda_mm1, mu_mm1)
@@ -0,0 +1,252 @@
+# Birth-death (M/M/1) chain stepping
+# The "race" simulators draw an exponential for the arrival and another for the departure at every step and throw one away.
+# The number of customers of the M/M/1 queue is a continuous-time Markov chain, which can instead be advanced with:
+# -> single draw: one exponential holding time with rate lambda + mu (lambda when the system is empty) and one uniform
+#    for the direction of the jump (an arrival with probability lambda/(lambda + mu))
+# -> uniformization: ticks of a Poisson process with rate lambda + mu, each one an arrival with probability lambda/(lambda + mu)
+#    or else a departure (a fictitious self-loop when the system is empty). Holding times and directions are drawn in blocks
+#    and the number of customers is a random walk reflected at 0, N_k = max(0, N_(k-1) + step_k), computed at once with
+#    a cumulative sum and a cumulative minimum (as the Lindley recursion).
+# Synthetic traces of the number of customers (e.g. for the MCMC estimator of rho) are observations of N(t) at given times, not the
+# number of customers after each event: the chain seen at its jumps (embedded chain) does not follow the stationary distribution
+# (1-rho)*rho^n, the chain seen at times independent of it does (PASTA for Poisson observation times). snapshotChunks observes the
+# uniformized chain (self-loops included, so N after each tick is N until the next one) at Poisson or evenly spaced times with a
+# binary search per chunk, starting from a stationary number of customers.
+
+import numpy as np
+
+from filas.distributions import Exponential, Uniform
+
+
+class BirthDeathStepper:
+
+    # Initializes the stepper with the rates of the chain; samples are taken from blocks generated in bulk
+    def __init__(self, lambda_mm1, mu_mm1, rng = None, block_size = 65536):
+        if rng is None:
+            rng = np.random.default_rng()
+        self.arrival_rate = lambda_mm1
+        self.total_rate = lambda_mm1 + mu_mm1
+        self.arrival_probability = lambda_mm1/(lambda_mm1 + mu_mm1)
+        self.next_holding = Exponential(1, rng, block_size).sample          # standard exponential, divided by the rate
+        self.next_direction = Uniform(0, 1, rng, block_size).sample
+
+    # This method returns the holding time in the state 'num_customers' and whether the jump is an arrival
+    def step(self, num_customers):
+        if(num_customers == 0):
+            return self.next_holding()/self.arrival_rate, True
+        return self.next_holding()/self.total_rate, self.next_direction() < self.arrival_probability
+
+
+# This function computes the random walk N_k = max(0, N_(k-1) + step_k) of a block of steps (+1 or -1) given its starting level
+def reflectedWalk(steps, start_level):
+    cumulative = np.cumsum(steps)
+    return cumulative - np.minimum(-start_level, np.minimum.accumulate(cumulative))
+
+
+# This generator simulates the uniformized M/M/1 chain chunk by chunk, yielding the real events (self-loops removed) of each chunk:
+# -> event times
+# -> number of customers in the system after each event
+# -> mask of the departure events
+# -> sojourn times (waiting queue + server) of the customers departing in this chunk (FIFO: the k-th departure is the k-th arrival)
+def uniformizedChunks(lambda_mm1, mu_mm1, rng = None, chunk_size = 1000000, initial_customers = 0):
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    total_rate = lambda_mm1 + mu_mm1
+    arrival_probability = lambda_mm1/total_rate
+
+    clock = 0.0                                             # time of the last tick
+    num_customers = initial_customers
+    pending_arrivals = np.zeros(initial_customers)          # arrival times of the customers still in the system
+
+    while True:
+        ticks = clock + np.cumsum(rng.exponential(1/total_rate, chunk_size))
+        steps = np.where(rng.random(chunk_size) < arrival_probability, 1, -1)
+        customers = reflectedWalk(steps, num_customers)
+        before = np.concatenate(([num_customers], customers[:-1]))
+        real = customers != before                          # a departure from an empty system is a self-loop
+        clock = ticks[-1]
+        num_customers = int(customers[-1])
+
+        event_times, customers = ticks[real], customers[real]
+        is_departure = steps[real] < 0
+        arrivals = np.concatenate((pending_arrivals, event_times[~is_departure]))
+        departures = event_times[is_departure]
+        sojourns = departures - arrivals[:len(departures)]
+        pending_arrivals = arrivals[len(departures):]
+
+        yield event_times, customers, is_departure, sojourns
+
+
+# This generator yields the chunks of the first 'max_iterations' events of the uniformized chain:
+# the event times, the number of customers in the system after each event and the sojourn times of the customers that departed within them
+def uniformizedIterations(lambda_mm1, mu_mm1, max_iterations = 10000, initial_customers = 0, rng = None, chunk_size = 1000000):
+
+    # No events: no chunk (as the event-driven loop, which then runs 0 iterations)
+    if(max_iterations <= 0):
+        return
+
+    # Self-loops are dropped, so a chunk has fewer events than ticks; chunks are still limited to about the number of events needed
+    chunk_size = max(1, min(chunk_size, max_iterations + 1))
+
+    num_events = 0
+    for event_times, customers, is_departure, sojourns in uniformizedChunks(lambda_mm1, mu_mm1, rng, chunk_size, initial_customers):
+        if(len(customers) == 0):
+            continue
+        missing = max_iterations - num_events
+        if len(customers) >= missing:
+            # Keeps only the events up to max_iterations and the customers that departed within them
+            yield event_times[:missing], customers[:missing], sojourns[:np.count_nonzero(is_departure[:missing])]
+            return
+        yield event_times, customers, sojourns
+        num_events += len(customers)
+
+
+# This generator yields, chunk by chunk, the busy periods of a M/M/1 queue that restarts with 1 customer whenever the server empties
+# (the idle periods are skipped, as in the busy period simulator of trabFinal_2), together with the index of the event ending each
+# busy period within the chunk and the number of events of the chunk.
+# The system never has 0 customers when it jumps, so every tick of the uniformized chain is a real event; M = N - 1 is a walk
+# reflected at 0 and each reflection (a departure of the last customer) ends a busy period.
+# Starting with 0 customers, the first busy period also includes the time until the first arrival (as in the event simulator).
+def busyPeriodChunks(lambda_mm1, mu_mm1, initial_customers = 1, rng = None, chunk_size = 1000000):
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    total_rate = lambda_mm1 + mu_mm1
+    arrival_probability = lambda_mm1/total_rate
+
+    clock = 0.0                                             # time since the beginning of the current busy period
+    level = max(0, initial_customers - 1)
+    first_events = 0
+    if(initial_customers == 0):
+        clock = rng.exponential(1/lambda_mm1)
+        first_events = 1
+
+    while True:
+        ticks = clock + np.cumsum(rng.exponential(1/total_rate, chunk_size))
+        steps = np.where(rng.random(chunk_size) < arrival_probability, 1, -1)
+        levels = reflectedWalk(steps, level)
+        before = np.concatenate(([level], levels[:-1]))
+        ends = np.flatnonzero((before == 0) & (steps < 0))
+        level = int(levels[-1])
+
+        # The ticks are counted from the beginning of the current busy period, the next periods start at the previous end
+        end_times = ticks[ends]
+        busy_periods = np.diff(end_times, prepend = 0.0)
+        clock = ticks[-1] - end_times[-1] if len(ends) else ticks[-1]
+
+        yield busy_periods, ends + first_events, chunk_size + first_events
+        first_events = 0
+
+
+# This function returns the time a M/M/1 queue starting with 'start' customers takes to reach 'target' customers (target < start)
+# Every state visited before has at least one customer, so all holding times have rate lambda + mu: only the directions of the jumps
+# are drawn (in blocks) until the walk reaches the target, and the duration, a sum of K exponentials, is a single Gamma(K) draw
+def firstPassageTime(lambda_mm1, mu_mm1, start, target, rng = None, block_size = 64):
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    total_rate = lambda_mm1 + mu_mm1
+    arrival_probability = lambda_mm1/total_rate
+
+    level = start
+    num_steps = 0
+    while True:
+        levels = level + np.cumsum(np.where(rng.random(block_size) < arrival_probability, 1, -1))
+        hits = np.flatnonzero(levels == target)
+        if(len(hits)):
+            return rng.gamma(num_steps + hits[0] + 1, 1/total_rate)
+        num_steps += block_size
+        level = levels[-1]
+
+
+# This function returns the first-passage times to 'target' of many independent M/M/1 trajectories simulated together in lock-step
+# (starts is the array of initial numbers of customers, all above the target)
+# The levels and step counts of the trajectories are NumPy arrays; at each iteration every active trajectory advances 'block_size' jumps
+# (a matrix of directions and its cumulative sum along the rows) and those that hit the target are retired with the number of jumps
+# until the hit. As the active trajectories become few (the long ones), the blocks grow so that the number of iterations stays small.
+# The durations are then drawn at once: the sum of K holding times with rate lambda + mu is Gamma(K).
+def firstPassageTimes(lambda_mm1, mu_mm1, starts, target, rng = None, block_size = 16, max_elements = 1 << 20):
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    total_rate = lambda_mm1 + mu_mm1
+    arrival_probability = lambda_mm1/total_rate
+
+    starts = np.asarray(starts)
+    num_steps = np.zeros(len(starts), dtype = np.int64)     # jumps until the target (final value once retired)
+    active = np.arange(len(starts))                         # indices of the trajectories that did not hit the target yet
+    levels = starts.astype(np.int64)
+    steps_done = 0                                          # jumps already made by every active trajectory
+
+    while(len(active)):
+        block = max(block_size, max_elements//len(active))
+        walks = levels[:, None] + np.cumsum(np.where(rng.random((len(active), block)) < arrival_probability, 1, -1), axis = 1)
+        hit = walks == target
+        retired = hit.any(axis = 1)
+        num_steps[active[retired]] = steps_done + hit[retired].argmax(axis = 1) + 1
+        active = active[~retired]
+        levels = walks[~retired, -1]
+        steps_done += block
+
+    return rng.gamma(num_steps, 1/total_rate)
+
+
+# This generator yields, chunk by chunk, the number of customers N(t) of the M/M/1 queue observed at the times of a Poisson process
+# with mean spacing 'interval' (poisson = True) or every 'interval' time units, as an array per chunk of about chunk_size ticks
+# The first observation is made after one spacing; without initial_customers the queue starts from its stationary distribution
+# (geometric, when rho < 1), so every observation follows it.
+def snapshotChunks(lambda_mm1, mu_mm1, interval, poisson = True, initial_customers = None, rng = None, chunk_size = 1000000):
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    total_rate = lambda_mm1 + mu_mm1
+    arrival_probability = lambda_mm1/total_rate
+    if initial_customers is None:
+        initial_customers = int(rng.geometric(1 - lambda_mm1/mu_mm1)) - 1 if lambda_mm1 < mu_mm1 else 0
+
+    clock = 0.0                                             # time of the last tick
+    num_customers = initial_customers
+    next_index = 1                                          # number of the next evenly spaced observation
+
+    while True:
+        ticks = clock + np.cumsum(rng.exponential(1/total_rate, chunk_size))
+        customers = reflectedWalk(np.where(rng.random(chunk_size) < arrival_probability, 1, -1), num_customers)
+
+        # Observation times between the previous chunk and the last tick of this one (for the Poisson process, their number is a
+        # Poisson draw and, given it, they are uniform over the span)
+        if(poisson):
+            times = np.sort(rng.uniform(clock, ticks[-1], rng.poisson((ticks[-1] - clock)/interval)))
+        else:
+            last_index = int(ticks[-1]//interval)
+            times = interval*np.arange(next_index, last_index + 1)
+            next_index = last_index + 1
+
+        # Number of customers at each observation: after the last tick before it (before the first tick, the one of the previous chunk)
+        latest = np.searchsorted(ticks, times, side = "right") - 1
+        yield np.where(latest >= 0, customers[np.maximum(latest, 0)], num_customers)
+
+        clock = ticks[-1]
+        num_customers = int(customers[-1])
+
+
+# This function returns a trace of 'num_samples' observations of the number of customers of the M/M/1 queue (snapshotChunks),
+# with chunks limited to about the number of ticks needed
+def snapshotTrace(lambda_mm1, mu_mm1, num_samples, interval, poisson = True, initial_customers = None, rng = None, chunk_size = 1000000):
+
+    chunk_size = max(1, min(chunk_size, int(num_samples*interval*(lambda_mm1 + mu_mm1)) + 1))
+
+    trace = np.empty(num_samples, dtype = np.int64)
+    filled = 0
+    for observations in snapshotChunks(lambda_mm1, mu_mm1, interval, poisson, initial_customers, rng, chunk_size):
+        if(filled >= num_samples):
+            break
+        kept = observations[:num_samples - filled]
+        trace[filled:filled + len(kept)] = kept
+        filled += len(kept)
+    return trace
@@ -0,0 +1,112 @@
+# Inference of the arrival and service rates of the M/M/1 queue from a timestamped event trace
+# A trace of the number of customers alone only identifies rho = lambda/mu; the times of the events identify lambda and mu.
+# The number of customers is a continuous-time Markov chain: in state n it stays an exponential time of rate lambda + mu (lambda when
+# n = 0) and then jumps up (an arrival, rate lambda) or down (a departure, rate mu). The exact log-likelihood of a trace of events
+# (time, type, number of customers before the event) observed from time 0 is
+#   sum over the events of log(rate of the jump) - (rate out of the state before the jump) * (time since the previous event)
+#   = A log(lambda) + D log(mu) - lambda T - mu B
+# with A arrivals, D departures, T the observed time and B the busy time (time with customers in the system). These four numbers
+# (EventStatistics, accumulated chunk by chunk with array operations, e.g. from the binary file of a filas.tracing.EventTracer)
+# are all the likelihood needs, so each evaluation costs O(1) and can be done for whole arrays of rates:
+# -> maximum likelihood: lambda = A/T and mu = D/B, with standard errors lambda/sqrt(A) and mu/sqrt(D) (inverse Fisher information)
+# -> posterior: 2-D Metropolis-Hastings on (log lambda, log mu) with filas.mcmc.metropolisHastings (flat prior on lambda and mu;
+#    the posterior is then also Gamma(A + 1, T) x Gamma(D + 1, B), which the samples can be checked against)
+
+import math
+import os
+import numpy as np
+
+from filas.mcmc import metropolisHastings
+from filas.tracing import ARRIVAL, DEPARTURE, RECORD_DTYPE
+
+
+class EventStatistics:
+
+    # Initializes the accumulator of a trace observed from start_time
+    def __init__(self, start_time = 0.0):
+        self.arrivals = 0
+        self.departures = 0
+        self.observed_time = 0.0
+        self.busy_time = 0.0
+        self.last_time = start_time
+
+    # This method accounts one event: its time, type (filas.tracing.ARRIVAL or DEPARTURE) and number of customers before it
+    def update(self, event_time, event_type, before):
+        elapsed = event_time - self.last_time
+        self.observed_time += elapsed
+        if(before > 0):
+            self.busy_time += elapsed
+        if(event_type == ARRIVAL):
+            self.arrivals += 1
+        elif(event_type == DEPARTURE):
+            self.departures += 1
+        self.last_time = event_time
+
+    # This method accounts a chunk of events at once (arrays of times, types and numbers of customers before each event)
+    def updateMany(self, event_times, event_types, before):
+        event_times = np.asarray(event_times, dtype = float)
+        if(len(event_times) == 0):
+            return
+        elapsed = np.diff(event_times, prepend = self.last_time)
+        self.observed_time += float(elapsed.sum())
+        self.busy_time += float(elapsed[np.asarray(before) > 0].sum())
+        self.arrivals += int(np.count_nonzero(np.asarray(event_types) == ARRIVAL))
+        self.departures += int(np.count_nonzero(np.asarray(event_types) == DEPARTURE))
+        self.last_time = float(event_times[-1])
+
+    # This method accounts the records of an EventTracer (structured array with fields time, type, before and after)
+    def updateRecords(self, records):
+        self.updateMany(records["time"], records["type"], records["before"])
+
+
+# This function returns the statistics of the binary trace written by a filas.tracing.EventTracer, read in chunks of chunk_size events
+# from a memory map (constant memory, whatever the size of the file)
+def readEventStatistics(file_path, chunk_size = 1 << 20, start_time = 0.0):
+    statistics = EventStatistics(start_time)
+    if(os.path.getsize(file_path) < RECORD_DTYPE.itemsize):
+        return statistics
+    records = np.memmap(file_path, dtype = RECORD_DTYPE, mode = "r")
+    for start in range(0, len(records), chunk_size):
+        statistics.updateRecords(records[start:start + chunk_size])
+    return statistics
+
+
+# This function returns the log-likelihood of the rates (scalars or arrays) given the statistics of a trace
+def logLikelihood(statistics, lambda_mm1, mu_mm1):
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        values = (statistics.arrivals*np.log(lambda_mm1) + statistics.departures*np.log(mu_mm1)
+                  - np.multiply(lambda_mm1, statistics.observed_time) - np.multiply(mu_mm1, statistics.busy_time))
+    return np.where((np.asarray(lambda_mm1) > 0) & (np.asarray(mu_mm1) > 0), values, -np.inf)
+
+
+# This function returns the maximum likelihood estimates of (lambda, mu) and their standard errors
+def maximumLikelihood(statistics):
+    lambda_mle = statistics.arrivals/statistics.observed_time if statistics.observed_time > 0 else math.nan
+    mu_mle = statistics.departures/statistics.busy_time if statistics.busy_time > 0 else math.nan
+    errors = (lambda_mle/math.sqrt(statistics.arrivals) if statistics.arrivals else math.nan,
+              mu_mle/math.sqrt(statistics.departures) if statistics.departures else math.nan)
+    return (lambda_mle, mu_mle), errors
+
+
+# This function returns the log posterior of (log lambda, log mu) for the values of all chains (chains x 2), with a flat prior on the rates
+# (the log of the Jacobian of the change of variables, log lambda + log mu, is added)
+def logPosterior(statistics):
+    def log_density(values):
+        log_rates = np.asarray(values, dtype = float)
+        return logLikelihood(statistics, np.exp(log_rates[:, 0]), np.exp(log_rates[:, 1])) + log_rates.sum(axis = 1)
+    return log_density
+
+
+# This function samples the posterior of (lambda, mu) with 'chains' chains of 2-D Metropolis-Hastings on (log lambda, log mu), started
+# around the maximum likelihood estimates, with the proposal scales tuned during the burn-in (options as in filas.mcmc.metropolisHastings)
+# It returns the samples of the rates (iterations x chains x 2, burn-in included) and the acceptance rate of each chain
+def sampleRates(statistics, iterations, rng, chains = 4, burn_in = 1000, target_ess = None, check_every = 1000):
+    (lambda_mle, mu_mle), _ = maximumLikelihood(statistics)
+    # Standard deviations of log lambda and log mu around the estimates, 1/sqrt(A) and 1/sqrt(D)
+    log_errors = np.array([1/math.sqrt(max(statistics.arrivals, 1)), 1/math.sqrt(max(statistics.departures, 1))])
+    initial = np.log([lambda_mle, mu_mle]) + 2*log_errors*rng.standard_normal((chains, 2))
+    samples, acceptance, _ = metropolisHastings(logPosterior(statistics), initial, iterations, rng, proposal_sigma = 1.7*log_errors,
+                                                target_ess = target_ess, burn_in = burn_in, check_every = check_every,
+                                                adapt = True, target_acceptance = 0.234)
+    return np.exp(samples), acceptance
+
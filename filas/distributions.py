@@ -0,0 +1,190 @@
+# Interarrival and service time distributions
+# Each distribution hands out samples from pre-generated NumPy blocks, refilled in bulk, instead of calling
+# the scalar rng.exponential() (about a microsecond of overhead) for every event:
+# -> sample() returns the next value of the current block (event-driven simulators)
+# -> samples(n) returns n new values as an array (vectorized engines)
+# mean() and secondMoment() are used by the analytical formulas (e.g. Pollaczek-Khinchine).
+
+import operator
+import numpy as np
+
+
+class Distribution:
+
+    # Initializes the distribution with its random number generator and the size of the blocks of samples
+    def __init__(self, rng = None, block_size = 65536):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.block_size = block_size
+        self.block = iter(())
+
+    # This method returns one sample, refilling the block when it is exhausted
+    def sample(self):
+        try:
+            return next(self.block)
+        except StopIteration:
+            self.block = iter(self.draw(self.block_size).tolist())
+            return next(self.block)
+
+    # This method returns 'n' samples as an array
+    def samples(self, n):
+        return self.draw(n)
+
+    # This method draws 'n' samples from the generator (implemented by each distribution)
+    def draw(self, n):
+        raise NotImplementedError
+
+    # Mean of the distribution
+    def mean(self):
+        raise NotImplementedError
+
+    # Second moment E[X^2] of the distribution
+    def secondMoment(self):
+        raise NotImplementedError
+
+    # Squared coefficient of variation Var[X]/E[X]^2
+    def scv(self):
+        return self.secondMoment()/self.mean()**2 - 1
+
+    # Description of the distribution for a run configuration (filas.result_cache): its name, its parameters and the state of its
+    # generator, which determine the samples it will hand out. None when samples of the current block are still pending.
+    def configuration(self):
+        if(operator.length_hint(self.block) > 0):
+            return None
+        parameters = {name: value for name, value in vars(self).items() if name not in ("rng", "block", "block_size")}
+        return {"distribution": type(self).__name__, **parameters, "rng_state": self.rng.bit_generator.state}
+
+
+# Exponential distribution with the given rate (lambda or mu); numpy uses the scale 1/rate
+class Exponential(Distribution):
+
+    def __init__(self, rate, rng = None, block_size = 65536):
+        super().__init__(rng, block_size)
+        self.rate = rate
+        self.scale = 1/rate
+
+    def draw(self, n):
+        return self.rng.exponential(self.scale, n)
+
+    def mean(self):
+        return self.scale
+
+    def secondMoment(self):
+        return 2*self.scale**2
+
+
+# Deterministic (fixed) value, as the service of the M/D/1 queue
+class Deterministic(Distribution):
+
+    def __init__(self, value, rng = None, block_size = 65536):
+        super().__init__(rng, block_size)
+        self.value = value
+
+    def sample(self):
+        return self.value
+
+    def configuration(self):
+        return {"distribution": "Deterministic", "value": self.value}
+
+    def draw(self, n):
+        return np.full(n, self.value, dtype = float)
+
+    def mean(self):
+        return self.value
+
+    def secondMoment(self):
+        return self.value**2
+
+
+# Uniform distribution on [low, high)
+class Uniform(Distribution):
+
+    def __init__(self, low = 0.0, high = 1.0, rng = None, block_size = 65536):
+        super().__init__(rng, block_size)
+        self.low = low
+        self.high = high
+
+    def draw(self, n):
+        return self.rng.uniform(self.low, self.high, n)
+
+    def mean(self):
+        return (self.low + self.high)/2
+
+    def secondMoment(self):
+        return (self.low**2 + self.low*self.high + self.high**2)/3
+
+
+# Erlang-k distribution: sum of k exponential phases, each with rate k*rate (so the mean is 1/rate)
+class Erlang(Distribution):
+
+    def __init__(self, k, rate, rng = None, block_size = 65536):
+        super().__init__(rng, block_size)
+        self.k = k
+        self.rate = rate
+
+    def draw(self, n):
+        return self.rng.gamma(self.k, 1/(self.k*self.rate), n)
+
+    def mean(self):
+        return 1/self.rate
+
+    def secondMoment(self):
+        return (self.k + 1)/(self.k*self.rate**2)
+
+
+# Hyperexponential distribution: exponential with rate rates[i] chosen with probability probabilities[i]
+class HyperExponential(Distribution):
+
+    def __init__(self, probabilities, rates, rng = None, block_size = 65536):
+        super().__init__(rng, block_size)
+        self.probabilities = np.asarray(probabilities, dtype = float)
+        self.rates = np.asarray(rates, dtype = float)
+
+    def draw(self, n):
+        phases = self.rng.choice(len(self.rates), size = n, p = self.probabilities)
+        return self.rng.exponential(1/self.rates[phases])
+
+    def mean(self):
+        return float(np.sum(self.probabilities/self.rates))
+
+    def secondMoment(self):
+        return float(np.sum(2*self.probabilities/self.rates**2))
+
+
+# Lognormal distribution given by the mean and standard deviation of the underlying normal
+class LogNormal(Distribution):
+
+    def __init__(self, mu, sigma, rng = None, block_size = 65536):
+        super().__init__(rng, block_size)
+        self.mu = mu
+        self.sigma = sigma
+
+    def draw(self, n):
+        return self.rng.lognormal(self.mu, self.sigma, n)
+
+    def mean(self):
+        return float(np.exp(self.mu + self.sigma**2/2))
+
+    def secondMoment(self):
+        return float(np.exp(2*self.mu + 2*self.sigma**2))
+
+
+# Empirical distribution: resamples (with replacement) the values of a trace, e.g. measured service times
+class Empirical(Distribution):
+
+    def __init__(self, values, rng = None, block_size = 65536):
+        super().__init__(rng, block_size)
+        self.values = np.asarray(values, dtype = float)
+
+    # This method builds the distribution from a text file with one value per line
+    @classmethod
+    def fromTrace(cls, file_path, rng = None, block_size = 65536):
+        return cls(np.loadtxt(file_path, ndmin = 1), rng, block_size)
+
+    def draw(self, n):
+        return self.values[self.rng.integers(0, len(self.values), n)]
+
+    def mean(self):
+        return float(self.values.mean())
+
+    def secondMoment(self):
+        return float(np.mean(self.values**2))
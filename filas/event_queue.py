@@ -0,0 +1,33 @@
+# Future event list (event calendar) for the event-driven simulators
+# Pending events are kept in a binary heap ordered by (time, sequence, type), so scheduling and removing
+# the next event cost O(log n) no matter how many events are pending (multiple servers, timeouts, many arrival streams).
+# The sequence number breaks ties between events with the same time: they leave the calendar in the order they were scheduled.
+
+import heapq
+from itertools import count
+
+
+class EventQueue:
+
+    # Initializes an empty calendar and the counter used as tie-breaker
+    def __init__(self):
+        self.heap = []
+        self.sequence = count()
+
+    # Number of pending events
+    def __len__(self):
+        return len(self.heap)
+
+    # This method schedules an event of type 'event_type' at time 'event_time'
+    # 'data' is an optional payload carried with the event (e.g. server or customer identifier)
+    def schedule(self, event_time, event_type, data = None):
+        heapq.heappush(self.heap, (event_time, next(self.sequence), event_type, data))
+
+    # This method removes the next event of the calendar and returns its time, type and payload
+    def pop(self):
+        event_time, _, event_type, data = heapq.heappop(self.heap)
+        return event_time, event_type, data
+
+    # This method returns the time of the next event without removing it from the calendar
+    def peekTime(self):
+        return self.heap[0][0]
@@ -0,0 +1,54 @@
+# Multi-level hitting-time tracker
+# Records, in one long run, the busy periods started by C customers for many values of C at once: the time from the first arrival
+# that brings the system to C customers (first passage to level C) until the system empties.
+# The number of customers moves by +1/-1, so within a busy period the levels are first reached in increasing order (1, 2, ..., highest):
+# an arrival only has to compare the new level with the highest level reached so far (O(1) per event), and the hit times are kept
+# in a fixed-size array indexed by level. When the system empties, the samples of every level reached are computed and added to
+# per-level statistics (count, mean, sum of squared deviations, min, max) in one vectorized operation.
+
+import math
+import numpy as np
+
+from filas.online_stats import OnlineStatistics
+
+
+class HittingTimeTracker:
+
+    # Initializes the tracker for the levels 1, 2, ..., max_level (higher levels are ignored)
+    def __init__(self, max_level):
+        self.max_level = max_level
+        self.hit_time = np.zeros(max_level + 1)         # time of the first passage to each level in the current busy period
+        self.highest = 0                                # highest level reached in the current busy period
+        self.count = np.zeros(max_level + 1, dtype = np.int64)
+        self.mean = np.zeros(max_level + 1)
+        self.m2 = np.zeros(max_level + 1)
+        self.min = np.full(max_level + 1, math.inf)
+        self.max = np.full(max_level + 1, -math.inf)
+
+    # This method registers an arrival at time 'event_time' that brought the system to 'new_level' customers
+    def arrival(self, event_time, new_level):
+        if(self.highest < new_level <= self.max_level):
+            self.hit_time[new_level] = event_time
+            self.highest = new_level
+
+    # This method registers that the system emptied at time 'event_time': the samples of every level reached are flushed at once
+    def emptied(self, event_time):
+        reached = slice(1, self.highest + 1)
+        values = event_time - self.hit_time[reached]
+        self.count[reached] += 1
+        delta = values - self.mean[reached]
+        self.mean[reached] += delta/self.count[reached]
+        self.m2[reached] += delta*(values - self.mean[reached])
+        np.minimum(self.min[reached], values, out = self.min[reached])
+        np.maximum(self.max[reached], values, out = self.max[reached])
+        self.highest = 0
+
+    # Accumulator (count, mean, std and confidence interval) of the samples of 'level'
+    def statistics(self, level):
+        stats = OnlineStatistics()
+        stats.count = int(self.count[level])
+        stats.mean = float(self.mean[level])
+        stats.m2 = float(self.m2[level])
+        stats.min = float(self.min[level])
+        stats.max = float(self.max[level])
+        return stats
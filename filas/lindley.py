@@ -0,0 +1,107 @@
+# Vectorized G/G/1 simulator based on the Lindley recursion (M/M/1, M/D/1 and any other distributions of filas.distributions)
+# Instead of advancing one event per Python loop iteration, interarrival and service times are drawn as NumPy arrays
+# and the waiting time in queue of every customer of a chunk is computed at once:
+#   W_k = max(0, W_(k-1) + S_(k-1) - A_k)      (A = interarrival time, S = service time)
+# which, with C_k = sum of (S_(j-1) - A_j) for j <= k, unrolls to W_k = C_k - min(-W_0, C_1, ..., C_k)
+# (a cumulative sum followed by a cumulative minimum).
+
+import numpy as np
+
+from filas.distributions import Deterministic, Exponential
+
+
+# This function computes the waiting times in queue of a chunk of customers given the waiting time of its first customer
+def lindleyWaits(interarrivals, services, first_wait):
+    increments = services[:-1] - interarrivals[1:]
+    cumulative = np.concatenate(([0.0], np.cumsum(increments)))
+    running_min = np.minimum.accumulate(np.concatenate(([-first_wait], cumulative[1:])))
+    return cumulative - running_min
+
+
+# This generator simulates the queue chunk by chunk, yielding the events of each chunk in time order:
+# -> event times
+# -> number of customers in the system after each event
+# -> mask of the departure events
+# -> sojourn times (waiting queue + server) of the customers departing in this chunk, in departure order
+# Departures that happen after the last arrival of a chunk are held back and yielded with the next chunk,
+# so the concatenation of all chunks is exactly the event sequence of the event-driven simulator.
+def lindleyChunks(arrival_distribution, service_distribution, chunk_size = 1000000, initial_customers = 0):
+
+    clock = 0.0                             # arrival time of the last customer drawn
+    last_departure = 0.0                    # departure time of the last customer drawn
+    num_customers = 0                       # number of customers in the system after the last yielded event
+    pending_departures = np.empty(0)        # departures (and sojourn times) held back from the previous chunk
+    pending_sojourns = np.empty(0)
+
+    initial_arrivals = initial_customers
+    while True:
+        # Initial customers are modelled as customers arriving at time 0 (their arrival events are not yielded)
+        interarrivals = np.concatenate((np.zeros(initial_arrivals), arrival_distribution.samples(chunk_size)))
+        services = service_distribution.samples(len(interarrivals))
+
+        arrival_times = clock + np.cumsum(interarrivals)
+        first_wait = max(0.0, last_departure - arrival_times[0])
+        sojourns = lindleyWaits(interarrivals, services, first_wait) + services
+        departure_times = arrival_times + sojourns
+        clock = arrival_times[-1]
+        last_departure = departure_times[-1]
+
+        # Departures up to the last arrival of the chunk are yielded now, the others wait for the next chunk
+        departure_times = np.concatenate((pending_departures, departure_times))
+        sojourns = np.concatenate((pending_sojourns, sojourns))
+        cut = np.searchsorted(departure_times, clock, side = "right")
+        pending_departures, pending_sojourns = departure_times[cut:], sojourns[cut:]
+        departure_times, sojourns = departure_times[:cut], sojourns[:cut]
+
+        # Merges arrivals (+1) and departures (-1) in time order and counts the customers after each event
+        event_times = np.concatenate((arrival_times, departure_times))
+        order = np.argsort(event_times, kind = "stable")
+        event_times = event_times[order]
+        is_departure = np.concatenate((np.zeros(len(arrival_times), dtype = bool), np.ones(cut, dtype = bool)))[order]
+        customers = num_customers + np.cumsum(np.where(is_departure, -1, 1))
+        num_customers = int(customers[-1])
+        event_times, customers, is_departure = event_times[initial_arrivals:], customers[initial_arrivals:], is_departure[initial_arrivals:]
+        initial_arrivals = 0
+
+        yield event_times, customers, is_departure, sojourns
+
+
+# This generator yields the chunks of the first 'max_iterations' events of a Lindley simulation:
+# the event times, the number of customers in the system after each event and the sojourn times of the customers that departed within them
+def lindleyIterations(arrival_distribution, service_distribution, max_iterations = 10000, initial_customers = 0, chunk_size = 1000000):
+
+    # No events: no chunk (as the event-driven loop, which then runs 0 iterations)
+    if(max_iterations <= 0):
+        return
+
+    # Each customer generates two events, so chunks larger than that are never needed
+    chunk_size = max(1, min(chunk_size, max_iterations//2 + 1))
+
+    num_events = 0
+    for event_times, customers, is_departure, sojourns in lindleyChunks(arrival_distribution, service_distribution, chunk_size, initial_customers):
+        missing = max_iterations - num_events
+        if len(customers) >= missing:
+            # Keeps only the events up to max_iterations and the customers that departed within them
+            yield event_times[:missing], customers[:missing], sojourns[:np.count_nonzero(is_departure[:missing])]
+            return
+        yield event_times, customers, sojourns
+        num_events += len(customers)
+
+
+# This function realizes a M/M/1 (or M/D/1) simulation with the Lindley engine
+# It returns the same outputs as the event-driven simulatorMM1 for the first 'max_iterations' events:
+# the sojourn time of every customer serviced and the number of customers in the system after each event
+def simulatorLindley(lambda_mm1, mu_mm1, max_iterations = 10000, deterministic_service = False, initial_customers = 0, rng = None, chunk_size = 1000000):
+
+    if rng is None:
+        rng = np.random.default_rng()
+    arrival_distribution = Exponential(lambda_mm1, rng)
+    service_distribution = Deterministic(1/mu_mm1) if deterministic_service else Exponential(mu_mm1, rng)
+
+    waits = [np.empty(0)]
+    customers = [np.empty(0, dtype = np.int64)]
+    for _, chunk_customers, sojourns in lindleyIterations(arrival_distribution, service_distribution, max_iterations, initial_customers, chunk_size):
+        customers.append(chunk_customers)
+        waits.append(sojourns)
+
+    return np.concatenate(waits), np.concatenate(customers)
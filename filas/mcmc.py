@@ -0,0 +1,183 @@
+# Metropolis-Hastings with many chains advanced together
+# K chains (e.g. several chains for each of several data sets) are NumPy arrays of K values: each iteration proposes, evaluates
+# and accepts or rejects for all of them with a few array operations, and the normal steps of the proposals are drawn in blocks.
+# The target of each chain is given by log_density(values), which returns the log of the (unnormalized) posterior of every chain
+# (-inf outside the support). Chains are grouped by target ("groups", lists of chain indices) for the diagnostics:
+# -> split R-hat (Gelman-Rubin, each chain cut in two halves): close to 1 when the chains of a group agree, e.g. below 1.01
+# -> effective sample size (ESS) of the group, from the autocorrelations of its chains (Geyer's initial monotone sequence)
+# -> acceptance rate of each chain
+# With a target ESS the sampler stops as soon as every group reaches it with an R-hat below max_rhat (checked every check_every iterations).
+# Proposals for a parameter bounded to an interval (e.g. rho in [0, 1]) do not have to be wasted on values outside it:
+# -> proposal = "normal": plain random walk, values outside the support are rejected by the log density
+# -> proposal = "reflect": the random walk is reflected at the bounds (still symmetric, no correction)
+# -> proposal = "logit": random walk on the logit of the parameter, with the Hastings correction of the change of variables
+# With adapt = True the scale of the proposals is tuned during the burn-in towards target_acceptance (Robbins-Monro steps on its log)
+# and then frozen, so the samples kept come from a fixed (valid) Markov chain.
+# <https://doi.org/10.1007/s11222-008-9110-y> (Andrieu and Thoms, A tutorial on adaptive MCMC)
+# When the posterior is known in closed form no chain is needed: GeometricPosterior is the exact (conjugate) posterior of rho for
+# observations of the geometric distribution, sampled directly.
+# <https://arxiv.org/abs/1903.08008> (Vehtari et al., Rank-normalization, folding, and localization: an improved R-hat)
+
+import math
+import numpy as np
+
+
+# This function returns the split R-hat of the samples (iterations x chains) of one target
+def rHat(samples):
+    samples = np.asarray(samples, dtype = float)
+    half = len(samples)//2
+    if(half < 2):
+        return math.nan
+    halves = np.concatenate((samples[:half], samples[len(samples) - half:]), axis = 1)
+    within = halves.var(axis = 0, ddof = 1).mean()
+    between = half*halves.mean(axis = 0).var(ddof = 1)
+    if(within == 0):
+        return math.nan
+    return math.sqrt(((half - 1)/half*within + between/half)/within)
+
+
+# This function returns the effective sample size of the samples (iterations x chains) of one target
+def effectiveSampleSize(samples):
+    samples = np.asarray(samples, dtype = float)
+    if(samples.ndim == 1):
+        samples = samples[:, None]
+    n, chains = samples.shape
+    if(n < 4):
+        return math.nan
+    # Autocovariances of each chain (FFT of the centered chain, padded to avoid the circular wrap)
+    centered = samples - samples.mean(axis = 0)
+    size = 1 << int(math.ceil(math.log2(2*n)))
+    spectrum = np.fft.rfft(centered, size, axis = 0)
+    autocovariance = np.fft.irfft(spectrum*np.conj(spectrum), size, axis = 0)[:n]/n
+    mean_variance = autocovariance[0].mean()*n/(n - 1)
+    variance = mean_variance*(n - 1)/n + (samples.mean(axis = 0).var(ddof = 1) if chains > 1 else 0.0)
+    if(variance == 0):
+        return math.nan
+    autocorrelation = 1 - (mean_variance - autocovariance.mean(axis = 1))/variance
+    autocorrelation[0] = 1
+    # Sums of consecutive pairs of autocorrelations, up to the first non-positive one and made non-increasing
+    pairs = autocorrelation[:2*(n//2)].reshape(-1, 2).sum(axis = 1)
+    negative = np.flatnonzero(pairs <= 0)
+    pairs = np.minimum.accumulate(pairs[:negative[0] if len(negative) else len(pairs)])
+    tau = max(-1 + 2*pairs.sum(), 1/math.log10(n*chains))
+    return n*chains/tau
+
+
+# This function returns the values folded into the interval [low, high] by reflection at its bounds
+def reflectInto(values, low, high):
+    width = high - low
+    folded = np.mod(np.subtract(values, low), 2*width)
+    return low + np.where(folded > width, 2*width - folded, folded)
+
+
+# This function returns the proposals from the current values for the (normal) steps, and the log of the Hastings correction
+# q(current | proposed)/q(proposed | current) (0 for the symmetric proposals)
+def proposeValues(current, steps, proposal = "normal", bounds = (0, 1)):
+    if(proposal == "reflect"):
+        return reflectInto(current + steps, *bounds), 0.0
+    if(proposal == "logit"):
+        low, high = bounds
+        unit = np.divide(np.subtract(current, low), high - low)
+        with np.errstate(divide = "ignore", over = "ignore", invalid = "ignore"):
+            logit = np.log(unit) - np.log1p(-unit) + steps
+            proposed_unit = 1/(1 + np.exp(-logit))
+            correction = np.log(proposed_unit) + np.log1p(-proposed_unit) - np.log(unit) - np.log1p(-unit)
+        return low + (high - low)*proposed_unit, correction
+    if(proposal != "normal"):
+        raise ValueError(f"unknown proposal '{proposal}'")
+    return current + steps, 0.0
+
+
+# This function returns the log of the proposal scale after one Robbins-Monro step towards the target acceptance rate: the scale grows
+# when the acceptance probability of the iteration is above the target and shrinks when it is below, by steps decreasing as iteration^-0.6
+# (0.44 is the optimal acceptance rate of a one-dimensional random walk, 0.234 in many dimensions)
+def adaptScale(log_sigma, acceptance_probability, iteration, target_acceptance = 0.44):
+    return log_sigma + (acceptance_probability - target_acceptance)/(iteration + 1)**0.6
+
+
+# This function returns the diagnostics (R-hat, ESS) of each group of chains (lists of chain indices) of the samples (iterations x chains);
+# for chains of vectors (iterations x chains x dimensions), the worst ones over the dimensions (largest R-hat, smallest ESS)
+def chainDiagnostics(samples, groups):
+    if(samples.ndim == 3):
+        per_dimension = [chainDiagnostics(samples[:, :, d], groups) for d in range(samples.shape[2])]
+        return [(max(r_hat for r_hat, _ in group), min(ess for _, ess in group)) for group in zip(*per_dimension)]
+    return [(rHat(samples[:, group]), effectiveSampleSize(samples[:, group])) for group in groups]
+
+
+# This function runs len(initial) chains of random walk Metropolis-Hastings on log_density (an array of values -> an array of
+# log densities) for up to 'iterations' iterations, with normal proposals of standard deviation proposal_sigma (one or one per chain)
+# The value of a chain can also be a vector: initial (chains x dimensions) then gives the starting point of each chain, log_density
+# receives the values of all chains (chains x dimensions) and proposal_sigma can give a scale per dimension
+# (the target acceptance rate of a random walk in many dimensions is lower, about 0.234)
+# proposal ("normal", "reflect" or "logit") and bounds select the kind of proposal, adapt tunes proposal_sigma during the burn-in
+# It returns the samples (iterations x chains [x dimensions]), the acceptance rate of each chain after the burn-in and the (final) scales
+# With target_ess, the run stops once every group of chains (by default all of them form one group) has an ESS of at least target_ess and
+# an R-hat below max_rhat, not counting the first burn_in iterations
+def metropolisHastings(log_density, initial, iterations, rng, proposal_sigma = 0.01, groups = None, target_ess = None, max_rhat = 1.01,
+                       burn_in = 0, check_every = 1000, proposal = "normal", bounds = (0, 1), adapt = False, target_acceptance = 0.44):
+
+    current = np.array(initial, dtype = float)
+    chains = len(current)
+    per_chain = (chains,) + (1,)*(current.ndim - 1)          # shape of the values of one chain, to broadcast its decisions over its vector
+    current_log = log_density(current)
+    log_sigma = np.log(np.broadcast_to(np.asarray(proposal_sigma, dtype = float), current.shape))
+    groups = [np.arange(chains)] if groups is None else groups
+    samples = np.empty((iterations,) + current.shape)
+    accepted = np.zeros(chains, dtype = np.int64)
+
+    done = 0
+    while(done < iterations):
+        # Standard normal steps and uniforms of a block of iterations
+        block = min(check_every, iterations - done)
+        normals = rng.standard_normal((block,) + current.shape)
+        log_uniforms = np.log(rng.random((block, chains)))
+        sigma = np.exp(log_sigma)
+        for k in range(block):
+            proposed, log_correction = proposeValues(current, normals[k]*sigma, proposal, bounds)
+            if(np.ndim(log_correction) > 1):
+                log_correction = log_correction.reshape(chains, -1).sum(axis = 1)
+            proposed_log = log_density(proposed)
+            with np.errstate(invalid = "ignore"):
+                log_ratio = proposed_log - current_log + log_correction
+                # A chain started outside the support (log density -inf) accepts any proposal
+                accept = (log_uniforms[k] < log_ratio) | (current_log == -math.inf)
+            current = np.where(accept.reshape(per_chain), proposed, current)
+            current_log = np.where(accept, proposed_log, current_log)
+            samples[done + k] = current
+            if(done + k >= burn_in):
+                accepted += accept
+            elif(adapt):
+                acceptance_probability = np.exp(np.minimum(np.nan_to_num(log_ratio, nan = -math.inf), 0)).reshape(per_chain)
+                log_sigma = adaptScale(log_sigma, acceptance_probability, done + k, target_acceptance)
+                sigma = np.exp(log_sigma)
+        done += block
+
+        if(target_ess is not None and done - burn_in >= 4 and done < iterations):
+            diagnostics = chainDiagnostics(samples[burn_in:done], groups)
+            if(all(ess >= target_ess and r_hat <= max_rhat for r_hat, ess in diagnostics)):
+                break
+
+    return samples[:done], accepted/max(done - burn_in, 1), np.exp(log_sigma)
+
+
+class GeometricPosterior:
+
+    # Exact posterior of rho for m observations of the geometric distribution P(n) = (1 - rho) * rho^n (e.g. the number of customers
+    # in the M/M/1 queue) whose sum is y: with a Beta(a, b) prior (Beta(1, 1) is the uniform prior on [0, 1]), the likelihood
+    # (1 - rho)^m * rho^y gives the Beta(a + y, b + m) posterior
+    def __init__(self, count, total, prior_alpha = 1, prior_beta = 1):
+        self.alpha = prior_alpha + total
+        self.beta = prior_beta + count
+
+    # Mean of the posterior, alpha/(alpha + beta)
+    def mean(self):
+        return self.alpha/(self.alpha + self.beta)
+
+    # Variance of the posterior, alpha*beta/((alpha + beta)^2 (alpha + beta + 1))
+    def variance(self):
+        total = self.alpha + self.beta
+        return self.alpha*self.beta/(total**2*(total + 1))
+
+    # This method returns 'size' independent samples of the posterior
+    def sample(self, size, rng):
+        return rng.beta(self.alpha, self.beta, size)
@@ -0,0 +1,194 @@
+# Constant-memory statistics accumulator
+# Keeps count, mean, sum of squared deviations (Welford's algorithm), min and max of a stream of samples,
+# so the simulators can report the mean, std and 1.96 confidence interval without storing every sample.
+# Two accumulators can be merged (Chan et al. parallel formula), e.g. to combine independent runs.
+
+import math
+import numpy as np
+
+
+class OnlineStatistics:
+
+    # Initializes an empty accumulator
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0               # sum of squared deviations from the mean
+        self.min = math.inf
+        self.max = -math.inf
+
+    # Number of samples added
+    def __len__(self):
+        return self.count
+
+    # This method adds one sample (Welford update)
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta/self.count
+        self.m2 += delta*(value - self.mean)
+        if(value < self.min): self.min = value
+        if(value > self.max): self.max = value
+
+    # This method adds a whole array of samples at once (statistics of the array merged into the accumulator)
+    def updateMany(self, values):
+        values = np.asarray(values, dtype = float)
+        if(values.size == 0):
+            return
+        batch = OnlineStatistics()
+        batch.count = values.size
+        batch.mean = float(values.mean())
+        batch.m2 = float(np.sum((values - batch.mean)**2))
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    # This method merges the samples of another accumulator into this one
+    def merge(self, other):
+        if(other.count == 0):
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta*other.count/total
+        self.m2 += other.m2 + delta*delta*self.count*other.count/total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    # Variance of the samples (population variance, same as np.var)
+    def variance(self):
+        return self.m2/self.count if self.count else math.nan
+
+    # Standard deviation of the samples (same as np.std)
+    def std(self):
+        return math.sqrt(self.variance())
+
+    # Same values as the metrics() function of the scripts: number of samples, mean, std and precision of the confidence interval
+    def metrics(self, precision = 1.96):
+        return self.count, self.mean, self.std(), precision
+
+    # Half-width of the confidence interval of the mean
+    def halfWidth(self, precision = 1.96):
+        if(self.count == 0):
+            return math.nan
+        return precision*(self.std()/math.sqrt(self.count))
+
+    # This method calculates the confidence interval of the mean
+    def confidenceInterval(self, precision = 1.96):
+        half_width = self.halfWidth(precision)
+        return self.mean - half_width, self.mean + half_width
+
+    # Half-width of the confidence interval relative to the mean (used by the sequential stopping rules)
+    def relativeHalfWidth(self, precision = 1.96):
+        return self.halfWidth(precision)/abs(self.mean) if self.mean else math.nan
+
+
+# Time-weighted accumulator of a piecewise-constant process such as the number of customers in the system N(t)
+# Instead of sampling N once per event, it integrates N over time: the area under N(t) gives L = E[N] and
+# the time spent at each level k (kept in an array indexed by k, grown when needed) gives the stationary pmf P(N = k).
+# The confidence interval of L uses batch means in time: the area is also split into batches of equal duration, whose averages are
+# nearly independent. Between num_batches and 2*num_batches batches are kept: when they reach 2*num_batches, consecutive pairs are
+# merged and the duration of the batches doubles, so the memory stays constant whatever the simulated time.
+class TimeWeightedStatistics:
+
+    # Initializes the accumulator with the level of the process at time 'start_time' (first batches of batch_duration time units)
+    def __init__(self, initial_level = 0, start_time = 0.0, batch_duration = 1.0, num_batches = 32):
+        self.level = initial_level
+        self.start_time = start_time
+        self.last_time = start_time
+        self.area = 0.0
+        self.time_at_level = np.zeros(max(16, 2*initial_level + 1))
+        self.num_batches = num_batches
+        self.batch_duration = batch_duration
+        self.batch_areas = np.zeros(0)          # areas of the completed batches
+        self.batch_start_area = 0.0             # area at the beginning of the current batch
+        self.next_boundary = start_time + batch_duration
+
+    # This method grows the histogram array so that it has an entry for 'level'
+    def _grow(self, level):
+        size = len(self.time_at_level)
+        while(size <= level):
+            size *= 2
+        if(size > len(self.time_at_level)):
+            self.time_at_level = np.concatenate((self.time_at_level, np.zeros(size - len(self.time_at_level))))
+
+    # This method registers that the process jumped to 'new_level' at time 'event_time'
+    def update(self, event_time, new_level):
+        duration = event_time - self.last_time
+        previous_area = self.area
+        self.area += duration*self.level
+        self.time_at_level[self.level] += duration
+        if(event_time >= self.next_boundary):
+            self._closeBatches(np.array([self.last_time, event_time]), np.array([previous_area, self.area]))
+        self.last_time = event_time
+        self.level = new_level
+        if(new_level >= len(self.time_at_level)):
+            self._grow(new_level)
+
+    # This method registers a whole array of jumps at once (event times in increasing order and the levels after each event)
+    def updateMany(self, event_times, new_levels):
+        if(len(event_times) == 0):
+            return
+        event_times = np.asarray(event_times, dtype = float)
+        new_levels = np.asarray(new_levels)
+        durations = np.diff(event_times, prepend = self.last_time)
+        levels = np.concatenate(([self.level], new_levels[:-1]))
+        self._grow(int(max(levels.max(), new_levels[-1])))
+        areas = self.area + np.cumsum(durations*levels)
+        if(event_times[-1] >= self.next_boundary):
+            self._closeBatches(np.concatenate(([self.last_time], event_times)), np.concatenate(([self.area], areas)))
+        self.area = float(areas[-1])
+        self.time_at_level[:levels.max() + 1] += np.bincount(levels, weights = durations)
+        self.last_time = float(event_times[-1])
+        self.level = int(new_levels[-1])
+
+    # Total observed time
+    def totalTime(self):
+        return self.last_time - self.start_time
+
+    # Time-average of the process (L when the process is the number of customers in the system)
+    def mean(self):
+        total = self.totalTime()
+        return self.area/total if total > 0 else math.nan
+
+    # Fraction of time spent at each level 0, 1, ..., highest level visited
+    def pmf(self):
+        total = self.totalTime()
+        visited = np.flatnonzero(self.time_at_level)
+        highest = visited[-1] if len(visited) else 0
+        return self.time_at_level[:highest + 1]/total if total > 0 else np.zeros(1)
+
+    # Averages of the completed batches
+    def batchMeans(self):
+        return self.batch_areas/self.batch_duration
+
+    # Half-width of the confidence interval of the time-average, from the batch means
+    def halfWidth(self, precision = 1.96):
+        means = OnlineStatistics()
+        means.updateMany(self.batchMeans())
+        return means.halfWidth(precision) if means.count >= 2 else math.nan
+
+    # This method calculates the confidence interval of the time-average
+    def confidenceInterval(self, precision = 1.96):
+        half_width = self.halfWidth(precision)
+        return self.mean() - half_width, self.mean() + half_width
+
+    # This method closes the batches whose end is within the times given with the area accumulated up to each of them
+    # (the area grows linearly between two consecutive times, so its value at the end of a batch is interpolated)
+    def _closeBatches(self, times, areas):
+        while(times[-1] >= self.next_boundary):
+            completed = len(self.batch_areas)
+            last = int((times[-1] - self.start_time)//self.batch_duration)
+            boundaries = self.start_time + self.batch_duration*np.arange(completed + 1, last + 1)
+            boundary_areas = np.interp(boundaries, times, areas)
+            self.batch_areas = np.concatenate((self.batch_areas, np.diff(boundary_areas, prepend = self.batch_start_area)))
+            self.batch_start_area = float(boundary_areas[-1])
+            # Too many batches: consecutive pairs are merged (with an odd number, the last one becomes part of the current batch)
+            while(len(self.batch_areas) >= 2*self.num_batches):
+                if(len(self.batch_areas) % 2):
+                    self.batch_start_area -= float(self.batch_areas[-1])
+                    self.batch_areas = self.batch_areas[:-1]
+                self.batch_areas = self.batch_areas.reshape(-1, 2).sum(axis = 1)
+                self.batch_duration *= 2
+            self.next_boundary = self.start_time + self.batch_duration*(len(self.batch_areas) + 1)
@@ -0,0 +1,124 @@
+# Lazy, headless plotting
+# matplotlib is only imported when the first figure is drawn (importing or running a simulator without plots does not load it),
+# with the Agg backend: figures are saved as PNG files instead of opening blocking windows, in $FILAS_PLOT_DIR (by default the
+# folder 'plots' of the working directory), named after the script and the title of the figure.
+# Large series are reduced with NumPy before drawing, so the cost of a figure does not grow with the number of samples:
+# -> plotSeries draws one bar per sample up to 'max_points' samples; above that the samples are grouped in max_points bins,
+#    drawn as the band between the minimum and the maximum of each bin (min/max decimation keeps the peaks the bars would show)
+# -> plotHistogram computes the counts with np.histogram (one pass, no sorting) and draws them as steps, optionally cumulative (CDF)
+# -> plotEcdf draws an empirical distribution function (filas.quantiles.ecdf) as steps, at most max_points of them
+# -> plotEstimates draws estimates with their confidence intervals against the analytical values (e.g. sweeps)
+
+import os
+import re
+import sys
+import numpy as np
+
+
+# This function imports matplotlib.pyplot on first use, selecting the Agg (file only) backend
+def pyplot():
+    if "matplotlib.pyplot" not in sys.modules:
+        import matplotlib
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+# This function groups 'values' in 'num_bins' consecutive bins and returns the index of the first sample of each bin
+# with the minimum and the maximum of the bin
+def minMaxDecimation(values, num_bins):
+    values = np.asarray(values, dtype = float)
+    starts = np.linspace(0, len(values), num_bins + 1).astype(np.int64)[:-1]
+    starts = np.unique(starts)
+    return starts, np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts)
+
+
+# Names of the files already saved by this process (a figure with the same title gets a numbered name instead of replacing it)
+_saved = set()
+
+
+# This function saves a figure in the plot folder and closes it; the file name defaults to the name of the script and the title
+def saveFigure(figure, title, file_name = None):
+    directory = os.environ.get("FILAS_PLOT_DIR", "plots")
+    os.makedirs(directory, exist_ok = True)
+    if file_name is None:
+        script = os.path.splitext(os.path.basename(sys.argv[0]))[0] if sys.argv and sys.argv[0] else "plot"
+        file_name = re.sub(r"[^A-Za-z0-9]+", "_", f"{script} {title}").strip("_") + ".png"
+    base, extension = os.path.splitext(file_name)
+    number = 1
+    while(file_name in _saved):
+        number += 1
+        file_name = f"{base}_{number}{extension}"
+    _saved.add(file_name)
+    path = os.path.join(directory, file_name)
+    figure.savefig(path)
+    pyplot().close(figure)
+    print(f"Plot saved to {path}")
+    return path
+
+
+# This function plots a series of samples (e.g. waiting time per customer, number of customers per iteration) as bars, positions
+# starting at 'start'; series longer than max_points are drawn as the min/max band of max_points bins
+def plotSeries(values, title, xlabel, ylabel, start = 0, max_points = 1000, file_name = None):
+    plt = pyplot()
+    values = np.asarray(values, dtype = float)
+    figure, axes = plt.subplots()
+    if(len(values) <= max_points):
+        axes.bar(np.arange(start, start + len(values)), values, color = "blue", width = 0.7)
+    elif(len(values) > 0):
+        starts, lows, highs = minMaxDecimation(values, max_points)
+        edges = np.append(starts, len(values)) + start
+        axes.fill_between(edges, np.append(lows, lows[-1]), np.append(highs, highs[-1]), step = "post", color = "blue", linewidth = 0)
+    axes.set_xlabel(xlabel)
+    axes.set_ylabel(ylabel)
+    axes.set_title(title)
+    return saveFigure(figure, title, file_name)
+
+
+# This function plots the histogram of 'values' (density or counts) or, with cumulative = True, its cumulative distribution
+def plotHistogram(values, title, xlabel = None, ylabel = None, bins = 30, density = True, cumulative = False, file_name = None):
+    plt = pyplot()
+    counts, edges = np.histogram(np.asarray(values, dtype = float), bins = bins)
+    total = counts.sum()
+    if(cumulative):
+        heights = np.cumsum(counts)/total if density and total else np.cumsum(counts)
+    else:
+        heights = counts/(total*np.diff(edges)) if density and total else counts
+    figure, axes = plt.subplots()
+    axes.stairs(heights, edges, color = "k" if cumulative else "C0", fill = not cumulative, alpha = 0.8 if cumulative else 0.6)
+    if xlabel is not None: axes.set_xlabel(xlabel)
+    if ylabel is not None: axes.set_ylabel(ylabel)
+    axes.set_title(title)
+    return saveFigure(figure, title, file_name)
+
+
+# This function plots the empirical distribution function given by its values x and cumulative fractions F (filas.quantiles.ecdf)
+# as steps; above max_points values, only the first value reaching each of max_points evenly spaced fractions is drawn
+def plotEcdf(x, F, title, xlabel = None, ylabel = "Cumulative fraction", max_points = 1000, file_name = None):
+    plt = pyplot()
+    x, F = np.asarray(x), np.asarray(F, dtype = float)
+    if(len(x) > max_points):
+        kept = np.unique(np.minimum(np.searchsorted(F, np.linspace(0, 1, max_points + 1)[1:]), len(x) - 1))
+        x, F = x[kept], F[kept]
+    figure, axes = plt.subplots()
+    axes.step(x, F, where = "post", color = "k")
+    if xlabel is not None: axes.set_xlabel(xlabel)
+    if ylabel is not None: axes.set_ylabel(ylabel)
+    axes.set_ylim(0, 1.05)
+    axes.set_title(title)
+    return saveFigure(figure, title, file_name)
+
+
+# This function plots estimates 'means' with the half-widths of their confidence intervals at the positions x,
+# and the analytical values 'expected' (when given) as a line
+def plotEstimates(x, means, half_widths, title, xlabel, ylabel, expected = None, expected_label = "Analytical", file_name = None):
+    plt = pyplot()
+    figure, axes = plt.subplots()
+    axes.errorbar(x, means, yerr = half_widths, fmt = "o", label = "Simulation")
+    if expected is not None:
+        axes.plot(x, expected, label = expected_label)
+    axes.set_xlabel(xlabel)
+    axes.set_ylabel(ylabel)
+    axes.set_title(title)
+    axes.legend()
+    return saveFigure(figure, title, file_name)
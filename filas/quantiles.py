@@ -0,0 +1,167 @@
+# Empirical distribution functions and quantiles
+# Two modes:
+# -> exact, over NumPy arrays of samples: ecdf() counts the distinct values (np.bincount, O(n), for non-negative integers such as
+#    numbers of customers; np.unique otherwise) instead of sorting Python lists, and quantiles() uses np.quantile
+# -> streaming, in bounded memory: QuantileSketch is a KLL-style sketch fed one sample (update) or one array (updateMany) at a time,
+#    e.g. from the simulator loop, which answers quantiles (p50, p95, p99...) of billions of samples keeping only a few hundred values.
+#    The samples are kept in "compactors": an item of level h stands for 2^h samples. When a level is over its capacity
+#    (k at the top level, 2/3 of that at the level below, and so on), it is sorted and every other item (starting at a random offset)
+#    is moved up one level with twice the weight. The rank error is about 1.7/k of the number of samples.
+#    <https://arxiv.org/abs/1603.05346> (Karnin, Lang and Liberty, Optimal Quantile Approximation in Streams)
+
+import math
+import numpy as np
+
+
+# This function returns the exact empirical distribution of the samples: the distinct values and the fraction of samples <= each one
+def ecdf(values):
+    values = np.asarray(values)
+    if(values.size == 0):
+        return np.empty(0), np.empty(0)
+    if(np.issubdtype(values.dtype, np.integer) and values.min() >= 0):
+        counts = np.bincount(values)
+        distinct = np.flatnonzero(counts)
+        return distinct, np.cumsum(counts[distinct])/values.size
+    distinct, counts = np.unique(values, return_counts = True)
+    return distinct, np.cumsum(counts)/values.size
+
+
+# This function returns the exact quantiles of the samples at the probabilities (e.g. [0.5, 0.95, 0.99])
+def quantiles(values, probabilities):
+    return np.quantile(np.asarray(values, dtype = float), probabilities)
+
+
+# This function returns the quantiles of a discrete distribution given by its pmf over 0, 1, 2, ... (e.g. the fraction of time
+# with k customers): the smallest k whose cumulative probability reaches each probability
+def pmfQuantiles(pmf, probabilities):
+    cumulative = np.cumsum(pmf)
+    return np.minimum(np.searchsorted(cumulative, np.asarray(probabilities)*cumulative[-1]), len(cumulative) - 1)
+
+
+class QuantileSketch:
+
+    # Initializes an empty sketch; k sets the accuracy and the memory (at most a few k values)
+    # The random offsets of the compactions come from 'rng' (a fixed seed by default, so the same samples give the same sketch)
+    def __init__(self, k = 1000, rng = None):
+        self.k = k
+        self.rng = rng if rng is not None else np.random.default_rng(0)
+        self.buffer = []                    # samples added one by one, moved to level 0 in blocks
+        self.levels = [np.empty(0)]         # compactors: an item of level h stands for 2^h samples
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    # Number of samples added
+    def __len__(self):
+        return self.count
+
+    # This method adds one sample
+    def update(self, value):
+        self.buffer.append(value)
+        self.count += 1
+        if(len(self.buffer) >= self.k):
+            self._flush()
+
+    # This method adds an array of samples at once
+    # A large array is sorted once and compacted directly to the level whose capacity it fits (every 2^j-th sample, from a random offset),
+    # which is what repeated compactions of the sorted array would give
+    def updateMany(self, values):
+        values = np.asarray(values, dtype = float)
+        if(values.size == 0):
+            return
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        level = int(math.log2(values.size/self.k)) if values.size >= 2*self.k else 0
+        if(level > 0):
+            step = 1 << level
+            values = np.sort(values)[self.rng.integers(step)::step]
+        self._add(level, values)
+
+    # This method merges the samples of another sketch into this one
+    def merge(self, other):
+        other._flush()
+        self._flush()
+        for level, items in enumerate(other.levels):
+            self._add(level, items, compress = False)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    # This method returns the (approximate) quantiles at the probabilities; a single probability gives a float
+    def quantile(self, probabilities):
+        items, weights = self._weighted()
+        if(len(items) == 0):
+            return np.full(np.shape(probabilities), math.nan) if np.ndim(probabilities) else math.nan
+        order = np.argsort(items, kind = "stable")
+        cumulative = np.cumsum(weights[order])
+        ranks = np.asarray(probabilities, dtype = float)*cumulative[-1]
+        result = items[order][np.minimum(np.searchsorted(cumulative, ranks), len(items) - 1)]
+        result = np.clip(result, self.min, self.max)
+        return float(result) if np.ndim(probabilities) == 0 else result
+
+    # This method returns the (approximate) fraction of samples <= x
+    def cdf(self, x):
+        items, weights = self._weighted()
+        total = weights.sum()
+        below = np.array([weights[items <= value].sum() for value in np.atleast_1d(x)])/total if total else np.full(np.shape(np.atleast_1d(x)), math.nan)
+        return float(below[0]) if np.ndim(x) == 0 else below
+
+    # Arrays describing the sketch, saved by filas.result_cache.packState
+    def state(self):
+        self._flush()
+        return {"items": np.concatenate(self.levels), "sizes": np.array([len(items) for items in self.levels]),
+                "count": np.asarray(self.count), "min": np.asarray(self.min), "max": np.asarray(self.max)}
+
+    # This method restores the arrays saved by state() (filas.result_cache.unpackState)
+    def restore(self, arrays):
+        bounds = np.cumsum(arrays["sizes"])[:-1]
+        self.levels = np.split(np.asarray(arrays["items"], dtype = float), bounds)
+        self.buffer = []
+        self.count = int(arrays["count"])
+        self.min = float(arrays["min"])
+        self.max = float(arrays["max"])
+
+    # Capacity of a level: k at the top level, decreasing by 2/3 at each level below
+    def _capacity(self, level):
+        return max(2, int(math.ceil(self.k*(2/3)**(len(self.levels) - level - 1))))
+
+    # This method moves the samples added one by one to level 0
+    def _flush(self):
+        if(self.buffer):
+            values = np.array(self.buffer, dtype = float)
+            self.buffer = []
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self._add(0, values)
+
+    # This method appends items to a level and compacts the levels over their capacity
+    def _add(self, level, items, compress = True):
+        while(len(self.levels) <= level):
+            self.levels.append(np.empty(0))
+        self.levels[level] = np.concatenate((self.levels[level], items))
+        if(compress):
+            self._compress()
+
+    # This method compacts, from the bottom, every level over its capacity: half of its items (sorted, every other one from a random
+    # offset) go up one level; with an odd number of items, the largest one stays
+    def _compress(self):
+        level = 0
+        while(level < len(self.levels)):
+            if(len(self.levels[level]) > self._capacity(level)):
+                if(level + 1 == len(self.levels)):
+                    self.levels.append(np.empty(0))
+                items = np.sort(self.levels[level])
+                paired = len(items) - len(items) % 2
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], items[self.rng.integers(2):paired:2]))
+                self.levels[level] = items[paired:]
+            level += 1
+
+    # Retained items (after moving the buffer to level 0) and their weights
+    def _weighted(self):
+        self._flush()
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), float(1 << level)) for level, level_items in enumerate(self.levels)])
+        return items, weights
@@ -0,0 +1,94 @@
+# Parallel independent replications
+# A sweep runs 'num_replications' replications of a simulation at each parameter point (e.g. C = 2, ..., 10 initial customers).
+# The (point, replication) tasks are grouped in batches of consecutive replications, which are spread over a process pool;
+# each worker reduces its batch to an OnlineStatistics accumulator, so only a few numbers travel back per batch,
+# and the accumulators of each point are merged (in submission order, so the result does not depend on the scheduling).
+# Replication r of point p always simulates with the stream (p, r) of the root seed (filas.streams), whatever the worker
+# (p being the index of the point or its key in point_keys).
+# The simulation function must be defined at the top level of a module (it is sent to the workers by name) and the script
+# that calls runReplications must protect its main code with 'if __name__ == "__main__":'.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from filas.online_stats import OnlineStatistics
+from filas.result_cache import codeVersion, packState, unpackState
+from filas.sequential import precisionReached
+from filas.streams import RandomStreams
+
+
+# This function runs the replications 'first' to 'last' - 1 of one point and returns the index of the point and their statistics
+# simulate(point, rng) returns the value observed in one replication (e.g. a busy period)
+# With vectorized = True, simulate(point, rng, count) returns the values of 'count' replications simulated together,
+# and the whole batch uses the stream (point, first)
+# point_key identifies the streams of the point in place of its index (e.g. a point added to a sweep later)
+def replicationBatch(simulate, point_index, point, root_seed, first, last, vectorized = False, point_key = None):
+    streams = RandomStreams(root_seed)
+    stats = OnlineStatistics()
+    if(point_key is None):
+        point_key = point_index
+    if(vectorized):
+        stats.updateMany(simulate(point, streams.stream(point_key, first), last - first))
+        return point_index, stats
+    for replication in range(first, last):
+        stats.update(simulate(point, streams.stream(point_key, replication)))
+    return point_index, stats
+
+
+# This function runs 'num_replications' replications of simulate(point, rng) for each point and returns one OnlineStatistics per point
+# workers is the number of processes (None uses every core) and batch_size the number of replications of each task
+# target_precision (e.g. 0.02) stops the replications of a point as soon as the relative half-width of its confidence interval
+# reaches it (after at least 'min_replications'); the points are then run in rounds of one batch per worker, checked between rounds
+# vectorized = True runs each batch with a single call simulate(point, rng, count) (e.g. lock-step trajectories); the results are then
+# reproducible for the same batch_size
+# point_keys gives the stream key of each point (by default its index), so that calls with different points use different streams
+# cache is a filas.result_cache.ResultCache: the statistics of each point are saved in it, and the points already saved with the same
+# simulation code, streams and options are loaded instead of run again (only the missing points are simulated)
+def runReplications(simulate, points, num_replications, streams, workers = None, batch_size = 100, target_precision = None, min_replications = 30,
+                    vectorized = False, point_keys = None, cache = None):
+
+    workers = workers or os.cpu_count()
+    stats = [OnlineStatistics() for _ in points]
+    submitted = [0]*len(points)                     # number of replications already submitted for each point
+    active = list(range(len(points)))
+    if(point_keys is None):
+        point_keys = list(range(len(points)))
+
+    configs = [None]*len(points)
+    if(cache is not None):
+        for p in range(len(points)):
+            configs[p] = {"simulate": f"{simulate.__module__}.{simulate.__qualname__}", "code": codeVersion(simulate), "point": points[p],
+                          "point_key": point_keys[p], "root_seed": streams.root_seed, "num_replications": num_replications, "batch_size": batch_size,
+                          "target_precision": target_precision, "min_replications": min_replications, "vectorized": vectorized,
+                          "workers": workers if target_precision else None}       # the rounds of the stopping rule depend on the number of workers
+            saved = cache.load(configs[p])
+            if(saved is not None):
+                unpackState(stats[p], saved, "stats")
+                active.remove(p)
+    computed = list(active)
+
+    with ProcessPoolExecutor(workers) as pool:
+        while(active):
+            futures = []
+            for p in active:
+                if(target_precision):
+                    last = min(num_replications, submitted[p] + workers*batch_size)
+                else:
+                    last = num_replications
+                for first in range(submitted[p], last, batch_size):
+                    futures.append(pool.submit(replicationBatch, simulate, p, points[p], streams.root_seed, first, min(first + batch_size, last),
+                                               vectorized, point_keys[p]))
+                submitted[p] = last
+
+            for future in futures:
+                p, batch_stats = future.result()
+                stats[p].merge(batch_stats)
+
+            # Without a target precision every replication was submitted in the first round
+            active = [p for p in active if submitted[p] < num_replications
+                      and not precisionReached(stats[p], target_precision, min_replications)]
+
+    if(cache is not None):
+        for p in computed:
+            cache.store(configs[p], packState(stats[p], "stats"))
+    return stats
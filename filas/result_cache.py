@@ -0,0 +1,166 @@
+# Content-addressed store of simulation results
+# A run is identified by its whole configuration (model, parameters, iterations, engine, seed or state of the random number
+# generator, version of the code...), given as a dictionary; the key of the run is the SHA-256 of its canonical JSON encoding
+# (NumPy arrays are encoded by the hash of their bytes). The results are saved as a compressed .npz file named by the key:
+# summary statistics (the attributes of the accumulators, see packState) and, optionally, the raw samples.
+# -> load(config) returns the saved arrays (None when the run was never saved), store(config, arrays) saves them
+# -> cached(config, compute) returns the saved arrays or calls compute() and saves its result
+# -> the files are evicted in least-recently-used order (their modification time is updated at each hit) when the total size
+#    of the directory exceeds max_bytes
+# Only runs whose configuration determines the results can be cached: a run with a fresh random seed always misses.
+# The version of the code (codeVersion) is the hash of the file that defines the simulation function together with the sources of
+# the whole filas package (the simulators, accumulators and generators the run uses), so a change in any of them is a new key.
+
+import hashlib
+import inspect
+import json
+import os
+import zipfile
+from functools import lru_cache
+import numpy as np
+
+# Folder of the filas package
+PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+# This function returns the hash of the sources of the filas package (every filas/*.py, in sorted order, with its name)
+# The modules are loaded once per process, so the hash is computed once too
+@lru_cache(maxsize = None)
+def packageVersion():
+    digest = hashlib.sha256()
+    for name in sorted(name for name in os.listdir(PACKAGE_DIRECTORY) if name.endswith(".py")):
+        with open(os.path.join(PACKAGE_DIRECTORY, name), "rb") as file:
+            digest.update(name.encode() + b"\0" + hashlib.sha256(file.read()).digest())
+    return digest.hexdigest()
+
+
+# This function returns the hash of the source file that defines 'function' and of the filas package (version of the code of a run)
+def codeVersion(function):
+    with open(inspect.getfile(function), "rb") as file:
+        return hashlib.sha256(file.read() + packageVersion().encode()).hexdigest()
+
+
+# This function encodes the values JSON does not know: NumPy scalars as numbers, arrays by their dtype, shape and hash
+def _encode(value):
+    if(isinstance(value, np.generic)):
+        return value.item()
+    if(isinstance(value, np.ndarray)):
+        return {"dtype": str(value.dtype), "shape": value.shape, "sha256": hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()}
+    raise TypeError(f"cannot encode {type(value).__name__} in a run configuration")
+
+
+# This function returns the key of a run configuration (SHA-256 of its canonical JSON encoding)
+def configurationKey(config):
+    encoded = json.dumps(config, sort_keys = True, separators = (",", ":"), default = _encode)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+# This function returns the attributes of an accumulator (numbers, arrays and nested accumulators, e.g. OnlineStatistics,
+# TimeWeightedStatistics, BatchMeans) as arrays named "prefix.attribute", to be saved with the results
+# An accumulator whose attributes are not arrays (e.g. filas.quantiles.QuantileSketch) describes itself with state() and restore()
+def packState(accumulator, prefix):
+    if(hasattr(accumulator, "state")):
+        return {f"{prefix}.{name}": np.asarray(value) for name, value in accumulator.state().items()}
+    arrays = {}
+    for name, value in vars(accumulator).items():
+        if(hasattr(value, "__dict__")):
+            arrays.update(packState(value, f"{prefix}.{name}"))
+        else:
+            arrays[f"{prefix}.{name}"] = np.asarray(value)
+    return arrays
+
+
+# This function restores into 'accumulator' (a new one, e.g. OnlineStatistics()) the attributes saved by packState
+def unpackState(accumulator, arrays, prefix):
+    if(hasattr(accumulator, "restore")):
+        accumulator.restore({name[len(prefix) + 1:]: value for name, value in arrays.items() if name.startswith(prefix + ".")})
+        return accumulator
+    for name, value in vars(accumulator).items():
+        if(hasattr(value, "__dict__")):
+            unpackState(value, arrays, f"{prefix}.{name}")
+        else:
+            saved = arrays[f"{prefix}.{name}"]
+            setattr(accumulator, name, saved.item() if saved.ndim == 0 else saved)
+    return accumulator
+
+
+class ResultCache:
+
+    # Initializes the store in 'directory' (by default $FILAS_CACHE_DIR or ~/.cache/filas), limited to max_bytes
+    def __init__(self, directory = None, max_bytes = 512*1024*1024):
+        if directory is None:
+            directory = os.environ.get("FILAS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "filas"))
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok = True)
+
+    # Path of the file of a run configuration
+    def path(self, config):
+        return os.path.join(self.directory, configurationKey(config) + ".npz")
+
+    # This method returns the arrays saved for the run configuration (a dictionary), or None when it was never saved
+    # A file that cannot be read (truncated, empty or not a valid .npz) is a miss too, and is removed so that store() rewrites it
+    def load(self, config):
+        path = self.path(config)
+        try:
+            with np.load(path) as saved:
+                arrays = {name: saved[name] for name in saved.files}
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            self.misses += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:           # already removed by another process
+                pass
+            return None
+        os.utime(path)                              # most recently used
+        self.hits += 1
+        return arrays
+
+    # This method saves the arrays of a run configuration (written to a temporary file and renamed, so a file is never half written)
+    # and evicts the least recently used files if the store is too big
+    def store(self, config, arrays):
+        path = self.path(config)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            np.savez_compressed(file, **arrays)
+        os.replace(temporary, path)
+        self.evict()
+
+    # This method returns the arrays saved for the run configuration, or computes them with compute() (a dictionary of arrays) and saves them
+    def cached(self, config, compute):
+        arrays = self.load(config)
+        if arrays is None:
+            arrays = {name: np.asarray(value) for name, value in compute().items()}
+            self.store(config, arrays)
+        return arrays
+
+    # Total size of the saved results, in bytes
+    def size(self):
+        return sum(os.path.getsize(path) for path in self._files())
+
+    # This method removes the least recently used files until the total size is at most max_bytes
+    def evict(self):
+        files = sorted(self._files(), key = os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in files)
+        for path in files:
+            if(total <= self.max_bytes):
+                break
+            try:
+                total -= os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:           # already removed by another process
+                pass
+
+    # This method removes every saved result
+    def clear(self):
+        for path in self._files():
+            os.remove(path)
+
+    # Paths of the saved results
+    def _files(self):
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".npz")]
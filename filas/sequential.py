@@ -0,0 +1,154 @@
+# Sequential stopping rules
+# Instead of a fixed number of iterations, a simulation runs in batches and stops as soon as the confidence interval
+# of its estimate reaches a target relative half-width (half-width / |mean|).
+# The samples of one run are correlated (consecutive waiting times), so the interval is built in one of two ways:
+# -> batch means: the run is cut into batches of consecutive samples, whose means are nearly independent
+# -> regenerative: the run is cut at regeneration points (a departure that leaves the system empty), cycles are i.i.d.
+# Independent replications (e.g. one busy period per replication) can use OnlineStatistics directly.
+
+import math
+import numpy as np
+
+from filas.online_stats import OnlineStatistics
+
+
+class BatchMeans:
+
+    # Initializes the estimator with batches of 'batch_size' consecutive samples
+    def __init__(self, batch_size = 1000):
+        self.batch_size = batch_size
+        self.batch_sum = 0.0
+        self.batch_count = 0
+        self.means = OnlineStatistics()         # statistics of the means of the completed batches
+
+    # Number of completed batches
+    @property
+    def count(self):
+        return self.means.count
+
+    # Mean of the completed batches
+    @property
+    def mean(self):
+        return self.means.mean
+
+    # This method adds one sample and returns True when it completes a batch
+    def update(self, value):
+        self.batch_sum += value
+        self.batch_count += 1
+        if(self.batch_count == self.batch_size):
+            self.means.update(self.batch_sum/self.batch_size)
+            self.batch_sum = 0.0
+            self.batch_count = 0
+            return True
+        return False
+
+    # This method adds a whole array of samples and returns the number of batches completed by them
+    def updateMany(self, values):
+        values = np.asarray(values, dtype = float)
+        missing = self.batch_size - self.batch_count
+        if(len(values) < missing):
+            self.batch_sum += float(values.sum())
+            self.batch_count += len(values)
+            return 0
+        first_mean = (self.batch_sum + float(values[:missing].sum()))/self.batch_size
+        values = values[missing:]
+        full = len(values)//self.batch_size
+        self.means.update(first_mean)
+        self.means.updateMany(values[:full*self.batch_size].reshape(full, self.batch_size).mean(axis = 1))
+        rest = values[full*self.batch_size:]
+        self.batch_sum = float(rest.sum())
+        self.batch_count = len(rest)
+        return full + 1
+
+    # Confidence interval of the mean built from the batch means
+    def confidenceInterval(self, precision = 1.96):
+        return self.means.confidenceInterval(precision)
+
+    # Half-width of the confidence interval relative to the mean
+    def relativeHalfWidth(self, precision = 1.96):
+        return self.means.relativeHalfWidth(precision)
+
+
+class RegenerativeStatistics:
+
+    # Initializes the estimator of a ratio mean = E[sum of the samples of a cycle] / E[number of samples of a cycle]
+    def __init__(self):
+        self.count = 0                  # number of completed cycles
+        self.sum_y = 0.0                # sums over cycles of Y (sum of samples), N (number of samples) and their products
+        self.sum_n = 0.0
+        self.sum_yy = 0.0
+        self.sum_nn = 0.0
+        self.sum_yn = 0.0
+        self.cycle_sum = 0.0            # current (not yet completed) cycle
+        self.cycle_length = 0
+
+    # Ratio estimate of the mean
+    @property
+    def mean(self):
+        return self.sum_y/self.sum_n if self.sum_n else math.nan
+
+    # This method adds one sample to the current cycle
+    def update(self, value):
+        self.cycle_sum += value
+        self.cycle_length += 1
+
+    # This method closes the current cycle (to be called at each regeneration point)
+    def endCycle(self):
+        self.updateCycles([self.cycle_sum], [self.cycle_length])
+        self.cycle_sum = 0.0
+        self.cycle_length = 0
+
+    # This method adds whole cycles at once, given the sum and the number of samples of each cycle
+    def updateCycles(self, sums, lengths):
+        sums = np.asarray(sums, dtype = float)
+        lengths = np.asarray(lengths, dtype = float)
+        self.count += len(sums)
+        self.sum_y += float(sums.sum())
+        self.sum_n += float(lengths.sum())
+        self.sum_yy += float(np.dot(sums, sums))
+        self.sum_nn += float(np.dot(lengths, lengths))
+        self.sum_yn += float(np.dot(sums, lengths))
+
+    # This method splits a chunk of samples at the regeneration points 'cycle_ends'
+    # (cycle_ends[i] is the index of the last sample of a cycle); samples after the last end stay in the current cycle
+    def updateMany(self, values, cycle_ends):
+        values = np.asarray(values, dtype = float)
+        cumulative = np.concatenate(([0.0], np.cumsum(values)))
+        if(len(cycle_ends) == 0):
+            self.cycle_sum += cumulative[-1]
+            self.cycle_length += len(values)
+            return
+        ends = np.asarray(cycle_ends) + 1
+        starts = np.concatenate(([0], ends[:-1]))
+        sums = cumulative[ends] - cumulative[starts]
+        lengths = ends - starts
+        sums[0] += self.cycle_sum
+        lengths[0] += self.cycle_length
+        self.updateCycles(sums, lengths)
+        self.cycle_sum = cumulative[-1] - cumulative[ends[-1]]
+        self.cycle_length = len(values) - ends[-1]
+
+    # Half-width of the confidence interval of the ratio estimate (central limit theorem for regenerative processes)
+    def halfWidth(self, precision = 1.96):
+        if(self.count < 2 or self.sum_n == 0):
+            return math.nan
+        ratio = self.mean
+        variance = max(0.0, (self.sum_yy - 2*ratio*self.sum_yn + ratio*ratio*self.sum_nn)/self.count)
+        return precision*math.sqrt(variance)/((self.sum_n/self.count)*math.sqrt(self.count))
+
+    # Confidence interval of the ratio estimate
+    def confidenceInterval(self, precision = 1.96):
+        half_width = self.halfWidth(precision)
+        return self.mean - half_width, self.mean + half_width
+
+    # Half-width of the confidence interval relative to the mean
+    def relativeHalfWidth(self, precision = 1.96):
+        return self.halfWidth(precision)/abs(self.mean) if self.sum_y else math.nan
+
+
+# This function checks the stopping rule: at least 'min_samples' independent units (samples, batches or cycles)
+# and a relative half-width not larger than 'target_precision'
+def precisionReached(estimator, target_precision, min_samples = 10):
+    if(estimator.count < min_samples):
+        return False
+    return estimator.relativeHalfWidth() <= target_precision
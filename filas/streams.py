@@ -0,0 +1,36 @@
+# Independent and reproducible random number streams
+# All the generators of a study are derived from one root seed with numpy's SeedSequence, so:
+# -> each replication, parameter point and worker gets its own statistically independent generator
+#    (instead of sharing np.random.seed() or creating unrelated default_rng() per call)
+# -> stream(*key) always returns the same generator for the same key (e.g. (C, replication)), whatever the order
+#    in which the tasks are executed or the process that executes them, so parallel runs are reproducible
+# -> the root seed (drawn from the OS when none is given) is kept in 'root_seed' to be recorded with the results
+# <https://numpy.org/doc/stable/reference/random/parallel.html>
+
+import numpy as np
+
+
+class RandomStreams:
+
+    # Initializes the manager with the root seed (None draws a fresh one, which is recorded)
+    def __init__(self, root_seed = None):
+        self.root = np.random.SeedSequence(root_seed)
+        self.root_seed = self.root.entropy
+
+    # This method returns the seed sequence of the stream identified by 'key' (non-negative integers)
+    # Seed sequences are small and picklable, so they can be sent to worker processes instead of generators
+    def seed(self, *key):
+        return np.random.SeedSequence(self.root_seed, spawn_key = key)
+
+    # This method returns the generator of the stream identified by 'key', e.g. stream(c, replication)
+    def stream(self, *key):
+        return np.random.default_rng(self.seed(*key))
+
+    # This method returns 'n' new independent generators (children of the root seed, never returned twice)
+    # Keyed streams with a single key (stream(i)) are the same as the children, so a study should use one style or the other
+    def spawn(self, n):
+        return [np.random.default_rng(child) for child in self.root.spawn(n)]
+
+    # Root seed to be recorded with the results, e.g. {"root_seed": ...}
+    def record(self):
+        return {"root_seed": self.root_seed}
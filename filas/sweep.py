@@ -0,0 +1,76 @@
+# Parameter sweeps
+# A sweep estimates a metric of a simulation (e.g. the average waiting time or busy period of the M/M/1 queue) over a grid of
+# parameter points (lambda, mu), with independent replications spread over a process pool (filas.replications):
+# -> the points are ordered by utilization rho = lambda/mu and, after each round, a midpoint is inserted between neighbouring
+#    points whose estimates differ by more than 'tolerance' (relative), so the grid gets finer where the metric changes fastest
+#    (near saturation, rho -> 1, where L, W and the busy period grow as 1/(1-rho))
+# -> with a target precision the replications of each point stop as soon as the confidence interval of its estimate reaches it,
+#    so the points with high variance (again near saturation) receive more replications, up to 'max_replications'
+# The k-th point of the sweep (in order of creation) uses the streams (k, replication) of the root seed, so a sweep is reproducible.
+
+from filas.replications import runReplications
+
+
+# This function returns the (lambda, mu) points of a grid of utilizations 'rhos' with service rate mu
+def rhoGrid(rhos, mu = 1):
+    return [(float(rho)*mu, mu) for rho in rhos]
+
+
+# This function returns the utilization rho = lambda/mu of a point (lambda, mu)
+def pointUtilization(point):
+    return point[0]/point[1]
+
+
+# This function returns the midpoints to insert between neighbouring points (sorted by utilization) whose estimates 'means'
+# differ by more than 'tolerance' relative to the smaller one, as long as their utilizations are more than 2*min_spacing apart
+def refinePoints(points, means, tolerance = 0.25, min_spacing = 0.005):
+    new_points = []
+    for k in range(len(points) - 1):
+        (lambda_a, mu_a), (lambda_b, mu_b) = points[k], points[k + 1]
+        change = abs(means[k + 1] - means[k])
+        if(change > tolerance*min(abs(means[k]), abs(means[k + 1]))
+           and pointUtilization(points[k + 1]) - pointUtilization(points[k]) > 2*min_spacing):
+            new_points.append(((lambda_a + lambda_b)/2, (mu_a + mu_b)/2))
+    return new_points
+
+
+# This function sweeps simulate(point, rng) over the points (lambda, mu) and returns the points sorted by utilization
+# (the initial ones and those added by the refinement) with the OnlineStatistics of each one
+# Each round runs the new points on the process pool (workers, batch_size and vectorized as in runReplications); up to 'max_rounds'
+# refinement rounds follow the first one, and max_points limits the size of the grid
+# cache is a filas.result_cache.ResultCache in which the statistics of each point are saved, so repeating a sweep only runs the new points
+def runSweep(simulate, points, streams, max_replications = 1000, workers = None, batch_size = 10, target_precision = 0.05, min_replications = 30,
+             tolerance = 0.25, min_spacing = 0.005, max_rounds = 4, max_points = 64, vectorized = False, cache = None):
+
+    results = {}                                    # point -> OnlineStatistics
+    keys = {}                                       # point -> key of its streams (order of creation)
+    new_points = list(dict.fromkeys(points))
+
+    for round_number in range(max_rounds + 1):
+        new_points = [point for point in dict.fromkeys(new_points) if point not in results][:max(0, max_points - len(results))]
+        if(not new_points):
+            break
+        for point in new_points:
+            keys[point] = len(keys)
+
+        stats = runReplications(simulate, new_points, max_replications, streams, workers, batch_size, target_precision, min_replications,
+                                vectorized, [keys[point] for point in new_points], cache)
+        results.update(zip(new_points, stats))
+
+        ordered = sorted(results, key = pointUtilization)
+        new_points = refinePoints(ordered, [results[point].mean for point in ordered], tolerance, min_spacing)
+
+    ordered = sorted(results, key = pointUtilization)
+    return ordered, [results[point] for point in ordered]
+
+
+# This function prints the table of a sweep: utilization, rates, number of replications, estimate, confidence interval
+# and, when given, the expected values (e.g. filas.analytical evaluated over the whole grid)
+def printSweep(points, stats, expected = None, metric = "Mean"):
+    print(f"{'Rho':>8} {'Lambda':>8} {'Mu':>8} {'Reps':>6} {metric:>12} {'Confidence Interval':>23}" + (f" {'Analytical':>12}" if expected is not None else ""))
+    for k, (point, point_stats) in enumerate(zip(points, stats)):
+        ciMin, ciMax = point_stats.confidenceInterval()
+        line = f"{pointUtilization(point):8.4f} {point[0]:8.4f} {point[1]:8.4f} {point_stats.count:6d} {point_stats.mean:12.4f} [{ciMin:10.4f}, {ciMax:10.4f}]"
+        if(expected is not None):
+            line += f" {expected[k]:12.4f}"
+        print(line)
@@ -0,0 +1,176 @@
+# Files of observations (e.g. the number of customers after each event, read by the MCMC estimator)
+# Two formats, told apart by the first bytes of the file:
+# -> binary: the magic bytes b"FILASTRC", the length of the header (uint32, little endian) and the header, a JSON object with the dtype
+#    of the values (fixed-width integers, "<i4" by default) and the metadata of the run (model, parameters, seed...), padded with spaces
+#    so that the values start at a multiple of 64 bytes; then the values, raw. Their number follows from the size of the file, so
+#    values can be appended (appendTrace) without rewriting the header.
+#    loadTrace returns a read-only np.memmap of the values: nothing is read or copied until the values are used.
+# -> text (legacy format): one value per line, parsed by NumPy's C parser (np.fromfile with a separator) instead of a Python loop
+# readTraceChunks reads either format in chunks of 'chunk_size' values, so traces larger than the memory can be processed
+# (e.g. summed) with constant memory.
+# TraceFollower tails a trace that is still being written: each read() returns only the values appended since the previous one
+# (a line or a value not completely written yet is kept for the next read).
+
+import json
+import os
+import struct
+import warnings
+import numpy as np
+
+MAGIC = b"FILASTRC"
+ALIGNMENT = 64
+
+
+# This function writes the values in the binary format, with the metadata (a JSON-encodable dictionary) in the header
+def writeTrace(file_path, values, metadata = None, dtype = "<i4"):
+    header = json.dumps({"dtype": np.dtype(dtype).str, "metadata": metadata or {}}).encode()
+    start = len(MAGIC) + 4 + len(header)
+    header += b" "*(-start % ALIGNMENT)
+    with open(file_path, "wb") as file:
+        file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        np.asarray(values).astype(dtype, copy = False).tofile(file)
+
+
+# This function appends values to a binary trace (converted to its dtype)
+def appendTrace(file_path, values):
+    dtype, _, _ = readHeader(file_path)
+    with open(file_path, "ab") as file:
+        np.asarray(values).astype(dtype, copy = False).tofile(file)
+
+
+# This function writes the values in the text format, one per line
+def writeTextTrace(file_path, values):
+    with open(file_path, "w") as file:
+        values = np.asarray(values).tolist()
+        file.write("\n".join(map(str, values)) + "\n" if values else "")
+
+
+# This function returns True when the file is in the binary format
+def isBinaryTrace(file_path):
+    with open(file_path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+# This function returns the dtype of the values, the metadata and the offset of the first value of a binary trace
+def readHeader(file_path):
+    with open(file_path, "rb") as file:
+        if(file.read(len(MAGIC)) != MAGIC):
+            raise ValueError(f"{file_path} is not a binary trace")
+        (length,) = struct.unpack("<I", file.read(4))
+        header = json.loads(file.read(length))
+    return np.dtype(header["dtype"]), header["metadata"], len(MAGIC) + 4 + length
+
+
+# This function returns the values of a trace: a read-only memory map for a binary trace, an array for a text trace
+def loadTrace(file_path):
+    if(isBinaryTrace(file_path)):
+        dtype, _, offset = readHeader(file_path)
+        count = (os.path.getsize(file_path) - offset)//dtype.itemsize
+        if(count == 0):
+            return np.empty(0, dtype = dtype)
+        return np.memmap(file_path, dtype = dtype, mode = "r", offset = offset, shape = (count,))
+    return _parseText(lambda: np.fromfile(file_path, dtype = np.int64, sep = "\n"), file_path)
+
+
+# This function returns the metadata saved in the header of a trace ({} for a text trace)
+def traceMetadata(file_path):
+    return readHeader(file_path)[1] if isBinaryTrace(file_path) else {}
+
+
+# This generator reads a trace in chunks (arrays) of 'chunk_size' values for a binary trace and of about 8*chunk_size bytes of lines
+# for a text trace, from the value number 'start' on
+def readTraceChunks(file_path, chunk_size = 1 << 20, start = 0):
+    if(isBinaryTrace(file_path)):
+        dtype, _, offset = readHeader(file_path)
+        with open(file_path, "rb") as file:
+            file.seek(offset + start*dtype.itemsize)
+            while(True):
+                data = file.read(chunk_size*dtype.itemsize)
+                chunk = np.frombuffer(data[:len(data) - len(data) % dtype.itemsize], dtype = dtype)
+                if(len(chunk) == 0):
+                    return
+                yield chunk
+    else:
+        # Blocks of about chunk_size lines, cut after their last complete line (the rest is carried to the next block)
+        skipped = 0
+        rest = b""
+        with open(file_path, "rb") as file:
+            while(True):
+                data = file.read(8*chunk_size)
+                block = rest + data
+                cut = len(block) if not data else block.rfind(b"\n") + 1
+                block, rest = block[:cut], block[cut:]
+                chunk = _parseBlock(block, file_path)
+                if(skipped < start):
+                    dropped = min(start - skipped, len(chunk))
+                    chunk = chunk[dropped:]
+                    skipped += dropped
+                if(len(chunk)):
+                    yield chunk
+                if(not data):
+                    return
+
+
+# This function returns the values of a block of complete lines of a text trace
+def _parseBlock(block, file_path):
+    if(not block.strip()):
+        return np.empty(0, dtype = np.int64)
+    return _parseText(lambda: np.fromstring(block.decode("ascii"), dtype = np.int64, sep = "\n"), file_path)
+
+
+# This function parses text with NumPy's parser, which stops at a value it cannot read with an error (older versions of NumPy only
+# warn, and the warning becomes the same error)
+def _parseText(parse, file_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return parse()
+        except (DeprecationWarning, ValueError):
+            raise ValueError(f"{file_path} has a line that is not an integer") from None
+
+
+class TraceFollower:
+
+    # Initializes the follower of a trace (which may not exist yet), reading up to chunk_size values at a time
+    # The trace is only expected to grow: values are appended, never rewritten
+    def __init__(self, file_path, chunk_size = 1 << 20):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.binary = None                  # format of the trace, known once its first bytes are written
+        self.itemsize = 1
+        self.dtype = None
+        self.position = 0                   # offset of the next byte to read
+        self.rest = b""                     # bytes read of a value (or line) not completely written yet
+        self.count = 0                      # number of values read
+
+    # This generator returns the values appended to the trace since the last read, in chunks
+    def read(self):
+        if(not os.path.exists(self.file_path)):
+            return
+        if(self.binary is None):
+            with open(self.file_path, "rb") as file:
+                first = file.read(len(MAGIC))
+            if(len(first) < len(MAGIC) and MAGIC.startswith(first)):
+                return                      # empty, or the magic bytes are not completely written yet
+            self.binary = first == MAGIC
+            if(self.binary):
+                try:
+                    self.dtype, _, self.position = readHeader(self.file_path)
+                except (ValueError, struct.error):          # header not completely written yet
+                    self.binary = None
+                    return
+                self.itemsize = self.dtype.itemsize
+        with open(self.file_path, "rb") as file:
+            file.seek(self.position)
+            while(True):
+                data = file.read(self.chunk_size*(self.itemsize if self.binary else 8))
+                if(not data):
+                    return
+                self.position += len(data)
+                block = self.rest + data
+                cut = len(block) - len(block) % self.itemsize if self.binary else block.rfind(b"\n") + 1
+                block, self.rest = block[:cut], block[cut:]
+                chunk = np.frombuffer(block, dtype = self.dtype) if self.binary else _parseBlock(block, self.file_path)
+                if(len(chunk)):
+                    self.count += len(chunk)
+                    yield chunk
@@ -0,0 +1,121 @@
+# Buffered event tracing
+# Replaces the per-event print() of the simulators: events are written into preallocated NumPy arrays and flushed in bulk
+# to a sink when the buffer is full (and when the tracer is closed):
+# -> a text file object (e.g. sys.stdout): formatted lines, written with a single write() per flush
+# -> a path ending in ".csv": CSV rows (time, type, before, after)
+# -> any other path: binary records (float64 time, int8 type, int32 before, int32 after)
+# Without a sink the buffer is a ring that keeps the last 'capacity' events in memory.
+# The simulators ask for a recorder once, before the loop (recorder() returns None when the level is disabled),
+# so a disabled tracer costs a single test of a local variable per event.
+
+import numpy as np
+
+# Trace levels
+OFF = 0
+INFO = 1            # notable events only (e.g. server emptied)
+EVENTS = 2          # every arrival and departure
+
+# Event types (same values as the ARRIVAL and DEPARTURE constants of the scripts)
+ARRIVAL = 1
+DEPARTURE = 2
+EVENT_NAMES = {ARRIVAL: "arrival", DEPARTURE: "departure"}
+
+RECORD_DTYPE = np.dtype([("time", "<f8"), ("type", "i1"), ("before", "<i4"), ("after", "<i4")])
+
+
+class EventTracer:
+
+    # Initializes the tracer with its level, the size of the buffer and the sink (file object, path or None)
+    # The text lines use text_format, with the names of the event types given by 'names' (EVENT_NAMES by default)
+    def __init__(self, level = EVENTS, capacity = 65536, sink = None, text_format = "[{time:08.4f}] {name:>10}, {before} => {after}", names = None):
+        self.level = level
+        self.capacity = capacity
+        self.text_format = text_format
+        self.names = EVENT_NAMES if names is None else names
+        self.buffer = np.empty(capacity, dtype = RECORD_DTYPE)
+        self.size = 0                   # number of events in the buffer
+        self.start = 0                  # position of the oldest event when the buffer is used as a ring
+        self.total = 0                  # number of events recorded since the beginning
+        self.own_sink = isinstance(sink, str)
+        if(sink is None):
+            self.sink_format = None
+        elif(self.own_sink and sink.endswith(".csv")):
+            self.sink_format = "csv"
+            sink = open(sink, "w")
+            sink.write("time,type,before,after\n")
+        elif(self.own_sink):
+            self.sink_format = "binary"
+            sink = open(sink, "wb")
+        else:
+            self.sink_format = "text"
+        self.sink = sink
+
+    # This method returns the function to call for each event at 'level', or None when this level is not traced
+    def recorder(self, level = EVENTS):
+        return self.record if self.level >= level else None
+
+    # This method records one event: its time, type and number of customers before and after it
+    def record(self, event_time, event_type, before, after):
+        if(self.size == self.capacity):
+            if(self.sink is None):
+                # Ring buffer: overwrites the oldest event
+                self.buffer[self.start] = (event_time, event_type, before, after)
+                self.start = (self.start + 1) % self.capacity
+                self.total += 1
+                return
+            self.flush()
+        self.buffer[self.size] = (event_time, event_type, before, after)
+        self.size += 1
+        self.total += 1
+
+    # This method records a whole chunk of events at once (arrays of times, types and customers before and after each event)
+    def recordMany(self, event_times, event_types, before, after):
+        records = np.empty(len(event_times), dtype = RECORD_DTYPE)
+        records["time"], records["type"], records["before"], records["after"] = event_times, event_types, before, after
+        self.total += len(records)
+        if(self.sink is None):
+            # Ring buffer: only the last 'capacity' events are kept
+            kept = np.concatenate((self.events(), records))[-self.capacity:]
+            self.buffer[:len(kept)] = kept
+            self.size = len(kept)
+            self.start = 0
+            return
+        while(len(records)):
+            if(self.size == self.capacity):
+                self.flush()
+            count = min(len(records), self.capacity - self.size)
+            self.buffer[self.size:self.size + count] = records[:count]
+            self.size += count
+            records = records[count:]
+
+    # Events kept in memory, in chronological order
+    def events(self):
+        return np.concatenate((self.buffer[self.start:self.size], self.buffer[:self.start]))
+
+    # This method writes the buffered events to the sink in bulk
+    def flush(self):
+        if(self.sink is None or self.size == 0):
+            return
+        records = self.buffer[:self.size]
+        if(self.sink_format == "binary"):
+            records.tofile(self.sink)
+        elif(self.sink_format == "csv"):
+            np.savetxt(self.sink, np.column_stack((records["time"], records["type"], records["before"], records["after"])),
+                       fmt = ["%.10g", "%d", "%d", "%d"], delimiter = ",")
+        else:
+            lines = [self.text_format.format(time = t, name = self.names.get(k, k), before = b, after = a)
+                     for t, k, b, a in zip(records["time"].tolist(), records["type"].tolist(), records["before"].tolist(), records["after"].tolist())]
+            self.sink.write("\n".join(lines) + "\n")
+        self.sink.flush()
+        self.size = 0
+
+    # This method flushes the remaining events and closes the sink if the tracer opened it
+    def close(self):
+        self.flush()
+        if(self.own_sink):
+            self.sink.close()
+
+
+# This function reads a binary trace written by EventTracer
+def readBinaryTrace(path):
+    return np.fromfile(path, dtype = RECORD_DTYPE)